@@ -0,0 +1,53 @@
+"""added indexes
+
+Revision ID: 3b5f0c9a7e21
+Revises: 87d1ee2143f4
+Create Date: 2026-10-18 12:04:11.315402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b5f0c9a7e21'
+down_revision = '87d1ee2143f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_charityproject_open_create_date', ['create_date', 'id'],
+            unique=False,
+            sqlite_where=sa.text('fully_invested = 0'),
+            postgresql_where=sa.text('NOT fully_invested'),
+        )
+        batch_op.create_index(
+            'ix_charityproject_closed_close_date', ['close_date'],
+            unique=False,
+            sqlite_where=sa.text('fully_invested = 1'),
+            postgresql_where=sa.text('fully_invested'),
+        )
+
+    with op.batch_alter_table('donation', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_donation_open_create_date', ['create_date', 'id'],
+            unique=False,
+            sqlite_where=sa.text('fully_invested = 0'),
+            postgresql_where=sa.text('NOT fully_invested'),
+        )
+        batch_op.create_index(
+            'ix_donation_user_id', ['user_id', 'id'], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('donation', schema=None) as batch_op:
+        batch_op.drop_index('ix_donation_user_id')
+        batch_op.drop_index('ix_donation_open_create_date')
+
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.drop_index('ix_charityproject_closed_close_date')
+        batch_op.drop_index('ix_charityproject_open_create_date')
@@ -0,0 +1,42 @@
+"""added fund statistics
+
+Revision ID: 5d2a7f3c1b94
+Revises: 9c41d2e8b6f3
+Create Date: 2026-10-18 16:05:11.402817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a7f3c1b94'
+down_revision = '9c41d2e8b6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'fundstatistics',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('donations_count', sa.Integer(), nullable=False),
+        sa.Column('donation_amount', sa.Integer(), nullable=False),
+        sa.Column('invested_amount', sa.Integer(), nullable=False),
+        sa.Column('projects_count', sa.Integer(), nullable=False),
+        sa.Column('open_projects', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        'INSERT INTO fundstatistics (id, donations_count, donation_amount, '
+        'invested_amount, projects_count, open_projects) SELECT 1, '
+        '(SELECT count(id) FROM donation), '
+        '(SELECT coalesce(sum(full_amount), 0) FROM donation), '
+        '(SELECT coalesce(sum(invested_amount), 0) FROM donation), '
+        '(SELECT count(id) FROM charityproject), '
+        '(SELECT count(id) FROM charityproject WHERE NOT fully_invested)'
+    )
+
+
+def downgrade():
+    op.drop_table('fundstatistics')
@@ -0,0 +1,55 @@
+"""added list indexes
+
+Revision ID: 9c41d2e8b6f3
+Revises: 3b5f0c9a7e21
+Create Date: 2026-10-18 14:37:52.108914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c41d2e8b6f3'
+down_revision = '3b5f0c9a7e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('charityproject', 'donation'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(
+                f'ix_{table}_create_date', ['create_date'], unique=False
+            )
+            batch_op.create_index(
+                f'ix_{table}_open_id', ['id'],
+                unique=False,
+                sqlite_where=sa.text('fully_invested = 0'),
+                postgresql_where=sa.text('NOT fully_invested'),
+            )
+            batch_op.create_index(
+                f'ix_{table}_closed_id', ['id'],
+                unique=False,
+                sqlite_where=sa.text('fully_invested = 1'),
+                postgresql_where=sa.text('fully_invested'),
+            )
+
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.drop_index('ix_charityproject_closed_close_date')
+
+
+def downgrade():
+    with op.batch_alter_table('charityproject', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_charityproject_closed_close_date', ['close_date'],
+            unique=False,
+            sqlite_where=sa.text('fully_invested = 1'),
+            postgresql_where=sa.text('fully_invested'),
+        )
+
+    for table in ('donation', 'charityproject'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_closed_id')
+            batch_op.drop_index(f'ix_{table}_open_id')
+            batch_op.drop_index(f'ix_{table}_create_date')
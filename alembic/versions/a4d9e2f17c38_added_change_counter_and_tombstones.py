@@ -0,0 +1,50 @@
+"""added change counter and tombstones
+
+Revision ID: a4d9e2f17c38
+Revises: e7b3c9d41a06
+Create Date: 2026-10-18 21:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9e2f17c38'
+down_revision = 'e7b3c9d41a06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'changeversion',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        'INSERT INTO changeversion (id, value) SELECT 1, max(version) FROM ('
+        'SELECT coalesce(max(version), 0) AS version FROM charityproject '
+        'UNION ALL '
+        'SELECT coalesce(max(version), 0) FROM donation) AS versions'
+    )
+    op.create_table(
+        'tombstone',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=100), nullable=False),
+        sa.Column('object_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_tombstone_table_version', 'tombstone',
+        ['table_name', 'version', 'id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tombstone_table_version', table_name='tombstone')
+    op.drop_table('tombstone')
+    op.drop_table('changeversion')
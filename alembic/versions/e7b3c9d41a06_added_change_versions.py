@@ -0,0 +1,63 @@
+"""added change versions
+
+Revision ID: e7b3c9d41a06
+Revises: 5d2a7f3c1b94
+Create Date: 2026-10-18 17:21:40.615093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c9d41a06'
+down_revision = '5d2a7f3c1b94'
+branch_labels = None
+depends_on = None
+
+PARTIAL_INDEXES = (
+    ('open_id', ['id'], 'fully_invested = 0', 'NOT fully_invested'),
+    ('closed_id', ['id'], 'fully_invested = 1', 'fully_invested'),
+    (
+        'open_create_date', ['create_date', 'id'],
+        'fully_invested = 0', 'NOT fully_invested'
+    ),
+)
+
+
+def upgrade():
+    for table in ('charityproject', 'donation'):
+        op.add_column(
+            table, sa.Column('updated_at', sa.DateTime(), nullable=True)
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                'version', sa.Integer(), nullable=False, server_default='0'
+            )
+        )
+        op.execute(
+            f'UPDATE {table} SET version = id, '
+            f'updated_at = coalesce(close_date, create_date)'
+        )
+        op.create_index(
+            f'ix_{table}_version', table, ['version', 'id'], unique=False
+        )
+
+
+def downgrade():
+    for table in ('charityproject', 'donation'):
+        op.drop_index(f'ix_{table}_version', table_name=table)
+        # Пересоздание таблицы в SQLite теряет условия частичных индексов.
+        for name, _, _, _ in PARTIAL_INDEXES:
+            op.drop_index(f'ix_{table}_{name}', table_name=table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
+            batch_op.drop_column('updated_at')
+        for name, columns, sqlite_where, postgresql_where in PARTIAL_INDEXES:
+            op.create_index(
+                f'ix_{table}_{name}', table, columns,
+                unique=False,
+                sqlite_where=sa.text(sqlite_where),
+                postgresql_where=sa.text(postgresql_where),
+            )
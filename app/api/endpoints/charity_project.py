@@ -1,20 +1,42 @@
-from typing import List
+from http import HTTPStatus
+from typing import Dict, List, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.filters import (
+    changes_filter, export_params, list_filter, set_changes_cursor
+)
+from app.api.serialization import encode_objects, get_list_body
 from app.api.validators import (
-    check_charity_project_before_delete, check_charity_project_before_update,
+    NAME_EXISTS_ERROR, check_charity_project_before_delete,
+    check_charity_project_before_update, check_charity_project_exists,
     check_name_duplicate
 )
+from app.core.cache import object_cache, response_cache
+from app.core.config import settings
 from app.core.db import get_async_session
 from app.core.user import current_superuser
 from app.crud.charity_project import charity_project_crud
 from app.models import CharityProject
+from app.models.change_version import committed_version_query
+from app.services.charity_project import bulk_update_projects
+from app.services.export import (
+    MEDIA_TYPES, PROJECT_EXPORT_FIELDS, export_headers, export_rows
+)
+from app.services.funding_events import stream_funding_events
 from app.services.investment import project_invest
+from app.services.investment_queue import (
+    QUEUE_MODE, investment_queue, set_investment_status
+)
 from app.schemas.charity_project import (
-    CharityProjectCreate, CharityProjectDB, CharityProjectUpdate
+    CharityProjectBulkResult, CharityProjectBulkUpdate, CharityProjectChange,
+    CharityProjectCreate, CharityProjectCreateDB, CharityProjectDB,
+    CharityProjectUpdate
 )
+from app.schemas.tombstone import TombstoneDB
 
 
 router = APIRouter()
@@ -26,17 +48,63 @@ router = APIRouter()
     response_model_exclude_none=True,
 )
 async def get_all_charity_projects(
+    request: Request,
+    filters: Dict = Depends(list_filter),
     session: AsyncSession = Depends(get_async_session),
-) -> List[CharityProject]:
+) -> Response:
     """
-    Возвращает список всех проектов.
+    Возвращает список проектов в порядке id.
+
+    Без limit возвращаются все проекты. Если страница заполнена,
+    заголовок X-Next-Cursor содержит after_id следующей страницы.
+    Пока счётчик версий изменений не менялся, ответ отдаётся из кэша;
+    при совпадении If-None-Match возвращается 304 после чтения одного
+    счётчика.
     """
-    return await charity_project_crud.get_multi(session)
+    version = (await session.execute(committed_version_query())).scalar()
+    etag = response_cache.etag(version)
+    if etag in request.headers.get('if-none-match', '').split(', '):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+        )
+    key = f'{request.url.path}?{request.url.query}'
+    cached = response_cache.get(key, version)
+    if cached is None:
+        cached = await get_list_body(
+            charity_project_crud, CharityProjectDB, session, filters
+        )
+        response_cache.set(key, version, *cached)
+    body, headers = cached
+    return Response(
+        body,
+        media_type='application/json',
+        headers={**headers, 'ETag': etag},
+    )
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_charity_projects(
+    filters: Dict = Depends(list_filter),
+    params: Dict = Depends(export_params),
+    session: AsyncSession = Depends(get_async_session),
+) -> StreamingResponse:
+    """
+    Выгружает проекты в NDJSON или CSV с фильтрами списка.
+    Строки передаются по мере чтения из БД.
+    """
+    return StreamingResponse(
+        export_rows(
+            charity_project_crud, session, PROJECT_EXPORT_FIELDS,
+            **params, **filters
+        ),
+        media_type=MEDIA_TYPES[params['export_format']],
+        headers=export_headers('charity_projects', **params),
+    )
 
 
 @router.post(
     '/',
-    response_model=CharityProjectDB,
+    response_model=CharityProjectCreateDB,
     response_model_exclude_none=True,
     dependencies=[Depends(current_superuser)],
 )
@@ -48,20 +116,103 @@ async def create_charity_project(
     Только для суперюзеров.
 
     Создаёт благотворительный проект.
+    В режиме очереди средства распределяются в фоне,
+    ответ содержит investment_status.
     """
     await check_name_duplicate(charity_project.name, session)
-    charity_project = await charity_project_crud.create(charity_project, session)
-    invested = await project_invest(
-        charity_project,
-        session
+    charity_project = await charity_project_crud.create(
+        charity_project, session, commit=False
     )
-    if invested:
-        session.add_all([*invested, charity_project])
+    if settings.investment_mode == QUEUE_MODE:
         await session.commit()
-        await session.refresh(charity_project)
+        charity_project.investment_status = investment_queue.put(
+            charity_project
+        )
+        return charity_project
+    await project_invest(charity_project, session)
+    await session.commit()
     return charity_project
 
 
+@router.get(
+    '/changes',
+    response_model=List[Union[CharityProjectChange, TombstoneDB]],
+    response_model_exclude_none=True,
+)
+async def get_charity_projects_changes(
+    response: Response,
+    filters: Dict = Depends(changes_filter),
+    session: AsyncSession = Depends(get_async_session),
+) -> List:
+    """
+    Проекты, изменённые после версии since, в порядке версии.
+
+    Удалённые проекты передаются записями {id, version, deleted}.
+    Заголовок X-Next-Cursor содержит since для следующего запроса.
+    """
+    projects = await charity_project_crud.get_changes(session, **filters)
+    set_changes_cursor(response, projects, filters['since'])
+    return projects
+
+
+@router.get('/stream', response_class=StreamingResponse)
+async def stream_charity_projects_funding() -> StreamingResponse:
+    """
+    Поток server-sent events с изменениями финансирования проектов.
+
+    После каждого commit, изменившего проект, передаётся событие
+    {project_id, invested_amount, fully_invested}.
+    """
+    return StreamingResponse(
+        stream_funding_events(), media_type='text/event-stream'
+    )
+
+
+@router.get(
+    '/{project_id}',
+    response_model=CharityProjectCreateDB,
+    response_model_exclude_none=True,
+)
+async def get_charity_project(
+    project_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    """
+    Возвращает проект по id.
+
+    Проект отдаётся из кэша, пока не изменилась его версия, которая
+    читается одним запросом по id; при совпадении If-None-Match
+    возвращается 304.
+    В режиме очереди проект читается из БД и нераспределённый проект
+    содержит investment_status.
+    """
+    if settings.investment_mode == QUEUE_MODE:
+        charity_project = await check_charity_project_exists(
+            project_id, session
+        )
+        await set_investment_status([charity_project], session)
+        return charity_project
+    version = await charity_project_crud.get_version(project_id, session)
+    cached = object_cache.get(CharityProject, project_id, version)
+    if cached is None:
+        charity_project = await check_charity_project_exists(
+            project_id, session
+        )
+        body = encode_objects(CharityProjectDB, charity_project)
+        cached = body, object_cache.set(
+            CharityProject, project_id, charity_project.version, body
+        )
+    body, etag = cached
+    if etag in request.headers.get('if-none-match', '').split(', '):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+        )
+    return Response(
+        body, media_type='application/json', headers={'ETag': etag}
+    )
+
+
 @router.delete(
     '/{project_id}',
     response_model=CharityProjectDB,
@@ -83,6 +234,26 @@ async def delete_charity_project(
     )
 
 
+@router.patch(
+    '/bulk',
+    response_model=CharityProjectBulkResult,
+    dependencies=[Depends(current_superuser)],
+)
+async def bulk_update_charity_projects(
+    obj_in: CharityProjectBulkUpdate,
+    session: AsyncSession = Depends(get_async_session),
+) -> Dict:
+    """
+    Только для суперюзеров.
+
+    Меняет описание или требуемую сумму нескольких проектов
+    либо закрывает их (close=true) на уже вложенной сумме.
+    Закрытые проекты и проекты, в которые вложено больше новой суммы,
+    пропускаются и возвращаются в skipped.
+    """
+    return await bulk_update_projects(obj_in, session)
+
+
 @router.patch(
     '/{project_id}',
     response_model=CharityProjectDB,
@@ -98,24 +269,27 @@ async def update_charity_project(
 
     Закрытый проект нельзя редактировать;
     нельзя установить требуемую сумму меньше уже вложенной.
+    Проект загружается один раз, изменения и распределение средств
+    фиксируются одним commit; совпадение имени определяет
+    ограничение уникальности в БД.
     """
-    if obj_in.full_amount is not None:
-        charity_project = await check_charity_project_before_update(
-            project_id, session, obj_in.full_amount
-        )
-    else:
-        charity_project = await check_charity_project_before_update(
-            project_id, session
-        )
-    if obj_in.name is not None:
-        await check_name_duplicate(obj_in.name, session)
-    charity_project = await charity_project_crud.update(charity_project, obj_in, session)
-    invested = await project_invest(
-        charity_project,
-        session
+    charity_project = await check_charity_project_before_update(
+        project_id, session, obj_in.full_amount
     )
-    if invested:
-        session.add_all([*invested, charity_project])
+    await charity_project_crud.update(
+        charity_project, obj_in, session, commit=False
+    )
+    try:
+        if obj_in.name is not None:
+            await session.flush()
+        await project_invest(charity_project, session)
         await session.commit()
-        await session.refresh(charity_project)
+    except IntegrityError:
+        await session.rollback()
+        if obj_in.name is None:
+            raise
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=NAME_EXISTS_ERROR,
+        )
     return charity_project
@@ -1,14 +1,30 @@
-from typing import List
+from typing import Dict, List, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.filters import (
+    changes_filter, donation_list_filter, export_params, set_changes_cursor
+)
+from app.api.serialization import get_list_body
+from app.core.config import settings
 from app.core.db import get_async_session
 from app.core.user import current_user, current_superuser
 from app.crud.donation import donation_crud
 from app.models import Donation, User
-from app.services.investment import project_invest
-from app.schemas.donation import DonationCreate, DonationDB, DonationGetAll
+from app.services.export import (
+    DONATION_EXPORT_FIELDS, MEDIA_TYPES, export_headers, export_rows
+)
+from app.services.investment import batch_invest, project_invest
+from app.services.investment_queue import (
+    QUEUE_MODE, investment_queue, set_investment_status
+)
+from app.schemas.donation import (
+    DonationBatchCreate, DonationChange, DonationCreate, DonationDB,
+    DonationGetAll, DonationSummary
+)
+from app.schemas.tombstone import TombstoneDB
 
 
 router = APIRouter()
@@ -26,19 +42,44 @@ async def create_donation(
 ) -> Donation:
     """
     Сделать пожертвование.
+
+    В режиме очереди пожертвование распределяется по проектам
+    в фоне, ответ содержит investment_status.
     """
-    donation = await donation_crud.create(donation, session, user)
-    invested = await project_invest(
-        donation,
-        session
+    donation = await donation_crud.create(
+        donation, session, user, commit=False
     )
-    if invested:
-        session.add_all([*invested, donation])
+    if settings.investment_mode == QUEUE_MODE:
         await session.commit()
-        await session.refresh(donation)
+        donation.investment_status = investment_queue.put(donation)
+        return donation
+    await project_invest(donation, session)
+    await session.commit()
     return donation
 
 
+@router.post(
+    '/batch',
+    response_model=List[DonationDB],
+    response_model_exclude_none=True
+)
+async def create_donations_batch(
+    donations: DonationBatchCreate,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user),
+) -> List[Donation]:
+    """
+    Сделать несколько пожертвований одним запросом.
+
+    Пожертвования создаются и распределяются по проектам
+    в одной транзакции; ответ содержит их в порядке запроса.
+    """
+    donations = await donation_crud.create_multi(donations, session, user)
+    await batch_invest(donations, session)
+    await session.commit()
+    return donations
+
+
 @router.get(
     '/',
     response_model=List[DonationGetAll],
@@ -46,14 +87,69 @@ async def create_donation(
     dependencies=[Depends(current_superuser)]
 )
 async def get_all_donations(
+    filters: Dict = Depends(donation_list_filter),
     session: AsyncSession = Depends(get_async_session)
-) -> List[Donation]:
+) -> Response:
+    """
+    Только для суперюзеров.
+
+    Возвращает список пожертвований в порядке id.
+    Без limit возвращаются все пожертвования. Если страница заполнена,
+    заголовок X-Next-Cursor содержит after_id следующей страницы.
+    """
+    body, headers = await get_list_body(
+        donation_crud, DonationGetAll, session, filters
+    )
+    return Response(body, media_type='application/json', headers=headers)
+
+
+@router.get(
+    '/changes',
+    response_model=List[Union[DonationChange, TombstoneDB]],
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_superuser)]
+)
+async def get_donations_changes(
+    response: Response,
+    filters: Dict = Depends(changes_filter),
+    session: AsyncSession = Depends(get_async_session)
+) -> List:
     """
     Только для суперюзеров.
 
-    Возвращает список всех пожертвований.
+    Пожертвования, изменённые после версии since, в порядке версии.
+    Удалённые пожертвования передаются записями {id, version, deleted}.
+    Заголовок X-Next-Cursor содержит since для следующего запроса.
     """
-    return await donation_crud.get_multi(session)
+    donations = await donation_crud.get_changes(session, **filters)
+    set_changes_cursor(response, donations, filters['since'])
+    return donations
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    dependencies=[Depends(current_superuser)]
+)
+async def export_donations(
+    filters: Dict = Depends(donation_list_filter),
+    params: Dict = Depends(export_params),
+    session: AsyncSession = Depends(get_async_session)
+) -> StreamingResponse:
+    """
+    Только для суперюзеров.
+
+    Выгружает пожертвования в NDJSON или CSV с фильтрами списка.
+    Строки передаются по мере чтения из БД.
+    """
+    return StreamingResponse(
+        export_rows(
+            donation_crud, session, DONATION_EXPORT_FIELDS,
+            **params, **filters
+        ),
+        media_type=MEDIA_TYPES[params['export_format']],
+        headers=export_headers('donations', **params),
+    )
 
 
 @router.get(
@@ -67,5 +163,27 @@ async def get_user_donations(
 ) -> Donation:
     """
     Вернуть список пожертвований пользователя, выполняющего запрос.
+
+    В режиме очереди нераспределённые пожертвования содержат
+    investment_status.
+    """
+    donations = await donation_crud.get_by_user(session, user)
+    if settings.investment_mode == QUEUE_MODE:
+        await set_investment_status(donations, session)
+    return donations
+
+
+@router.get(
+    '/my/summary',
+    response_model=DonationSummary,
+)
+async def get_user_donations_summary(
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user),
+) -> Dict:
+    """
+    Итоги пожертвований пользователя, выполняющего запрос:
+    количество, общая, распределённая и оставшаяся сумма,
+    дата последнего пожертвования.
     """
-    return await donation_crud.get_by_user(session, user)
+    return await donation_crud.get_user_summary(session, user)
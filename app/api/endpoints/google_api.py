@@ -1,18 +1,23 @@
 from datetime import datetime
-from typing import List
+from http import HTTPStatus
+from typing import Dict, List
 
-from aiogoogle import Aiogoogle
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.filters import report_filter
+from app.api.validators import check_report_job_exists
 from app.core.db import get_async_session
-from app.core.google_client import get_service
+from app.core.google_client import GoogleClientManager, get_service
 from app.core.user import current_superuser
 from app.crud.charity_project import charity_project_crud
-from app.schemas.charity_project import CharityProjectDB
+from app.schemas.charity_project import CharityProjectDuration
+from app.schemas.report import ReportJobDB
 from app.services.google_api import (
-    set_user_permissions, spreadsheets_create, spreadsheets_update_value
+    get_report_sheets, get_spreadsheet_body, set_user_permissions,
+    spreadsheets_create, spreadsheets_update_value
 )
+from app.services.report_jobs import report_jobs
 
 
 FORMAT = "%Y/%m/%d %H:%M:%S"
@@ -23,22 +28,67 @@ router = APIRouter()
 
 @router.get(
     '/',
-    response_model=List[CharityProjectDB],
+    response_model=List[CharityProjectDuration],
     dependencies=[Depends(current_superuser)],
 )
 async def get_report(
         session: AsyncSession = Depends(get_async_session),
-        wrapper_services: Aiogoogle = Depends(get_service)
+        wrapper_services: GoogleClientManager = Depends(get_service),
+        filters: Dict = Depends(report_filter),
+) -> List[Dict]:
+    """
+    Только для суперюзеров.
 
-):
-    """Только для суперюзеров."""
-    projects = await charity_project_crud.get_fully_invested_projects(
-        session
+    Закрытые проекты от быстрее всего закрытых к медленным,
+    limit и окно по дате закрытия ограничивают отчёт.
+    """
+    projects = await charity_project_crud.get_projects_by_completion_rate(
+        session, **filters
     )
     now_date_time = datetime.now().strftime(FORMAT)
-    spreadsheet_id = await spreadsheets_create(wrapper_services, now_date_time)
+    sheets = get_report_sheets(projects, now_date_time)
+    spreadsheet_id = await spreadsheets_create(
+        wrapper_services, now_date_time, get_spreadsheet_body(sheets)
+    )
     await set_user_permissions(spreadsheet_id, wrapper_services)
-    await spreadsheets_update_value(
-        spreadsheet_id, projects, wrapper_services, now_date_time
+    await spreadsheets_update_value(spreadsheet_id, sheets, wrapper_services)
+    return [
+        dict(name=name, duration=duration, description=description)
+        for name, duration, description in projects
+    ]
+
+
+@router.post(
+    '/reports',
+    response_model=ReportJobDB,
+    status_code=HTTPStatus.ACCEPTED,
+    dependencies=[Depends(current_superuser)],
+)
+async def create_report_job(
+        session: AsyncSession = Depends(get_async_session),
+        filters: Dict = Depends(report_filter),
+) -> Dict:
+    """
+    Только для суперюзеров.
+
+    Ставит формирование отчёта в фон; запрос с теми же данными
+    получает уже запущенную или готовую задачу.
+    """
+    projects = await charity_project_crud.get_projects_by_completion_rate(
+        session, **filters
     )
-    return projects
+    now_date_time = datetime.now().strftime(FORMAT)
+    job = report_jobs.submit(
+        get_report_sheets(projects, now_date_time), now_date_time
+    )
+    return job.as_dict()
+
+
+@router.get(
+    '/reports/{job_id}',
+    response_model=ReportJobDB,
+    dependencies=[Depends(current_superuser)],
+)
+async def get_report_job(job_id: str) -> Dict:
+    """Только для суперюзеров. Статус, прогресс и ссылка на отчёт."""
+    return check_report_job_exists(job_id).as_dict()
@@ -0,0 +1,22 @@
+from typing import Dict
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_session
+from app.schemas.statistics import FundStatisticsDB
+from app.services.statistics import get_statistics
+
+
+router = APIRouter()
+
+
+@router.get('/', response_model=FundStatisticsDB)
+async def get_fund_statistics(
+    session: AsyncSession = Depends(get_async_session),
+) -> Dict:
+    """
+    Итоги фонда: собранные и распределённые средства,
+    нераспределённый остаток пожертвований, число проектов и открытых проектов.
+    """
+    return await get_statistics(session)
@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import Depends, Query, Response
+
+from app.services.export import CSV_FORMAT, NDJSON_FORMAT
+
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def list_filter(
+    after_id: Optional[int] = Query(
+        None, ge=0, description='Вернуть объекты с id больше указанного.'
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description='Размер страницы.'
+    ),
+    fully_invested: Optional[bool] = None,
+    created_from: Optional[datetime] = Query(
+        None, description='Созданные не раньше указанного времени.'
+    ),
+    created_to: Optional[datetime] = Query(
+        None, description='Созданные раньше указанного времени.'
+    ),
+) -> Dict:
+    return dict(
+        after_id=after_id,
+        limit=limit,
+        fully_invested=fully_invested,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+
+def donation_list_filter(
+    filters: Dict = Depends(list_filter),
+    user_id: Optional[int] = None,
+) -> Dict:
+    return dict(filters, user_id=user_id)
+
+
+def get_next_cursor(objs: List, limit: Optional[int]) -> Dict:
+    """Заголовок с курсором следующей страницы, если страница заполнена."""
+    if limit is not None and len(objs) == limit:
+        return {NEXT_CURSOR_HEADER: str(objs[-1].id)}
+    return {}
+
+
+def changes_filter(
+    since: int = Query(
+        0, ge=0, description='Вернуть объекты, изменённые после версии.'
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description='Размер страницы.'
+    ),
+) -> Dict:
+    return dict(since=since, limit=limit)
+
+
+def set_changes_cursor(response: Response, objs: List, since: int) -> None:
+    """Передаёт версию, с которой запрашивать следующие изменения."""
+    response.headers[NEXT_CURSOR_HEADER] = str(
+        objs[-1].version if objs else since
+    )
+
+
+def export_params(
+    export_format: str = Query(
+        NDJSON_FORMAT,
+        alias='format',
+        regex=f'^({NDJSON_FORMAT}|{CSV_FORMAT})$',
+        description='Формат выгрузки.',
+    ),
+    gzip: bool = Query(False, description='Сжать выгрузку gzip.'),
+) -> Dict:
+    return dict(export_format=export_format, gzip=gzip)
+
+
+def report_filter(
+    limit: Optional[int] = Query(
+        None, ge=1, description='Число проектов в отчёте.'
+    ),
+    closed_from: Optional[datetime] = Query(
+        None, description='Закрытые не раньше указанного времени.'
+    ),
+    closed_to: Optional[datetime] = Query(
+        None, description='Закрытые раньше указанного времени.'
+    ),
+) -> Dict:
+    return dict(limit=limit, closed_from=closed_from, closed_to=closed_to)
@@ -2,7 +2,7 @@ from fastapi import APIRouter
 
 from app.api.endpoints import (
     google_api_router, charity_project_router,
-    donation_router, user_router
+    donation_router, statistics_router, user_router
 )
 
 
@@ -19,6 +19,11 @@ main_router.include_router(
     prefix='/donation',
     tags=['donations']
 )
+main_router.include_router(
+    statistics_router,
+    prefix='/statistics',
+    tags=['statistics']
+)
 main_router.include_router(
     google_api_router,
     prefix='/google',
@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Tuple
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.filters import get_next_cursor
+from app.core.config import settings
+
+
+def get_schema_fields(schema, model) -> Tuple[str, ...]:
+    """Поля схемы ответа, хранящиеся в таблице модели, в порядке схемы."""
+    columns = model.__table__.columns
+    return tuple(name for name in schema.__fields__ if name in columns)
+
+
+def encode_rows(fields: Tuple[str, ...], rows: Iterable) -> bytes:
+    """
+    Кодирует строки выборки в JSON без создания объектов схемы.
+
+    Результат совпадает с ответом FastAPI для response_model со схемой
+    fields и response_model_exclude_none=True.
+    """
+    return orjson.dumps([
+        {field: value for field, value in zip(fields, row) if value is not None}
+        for row in rows
+    ])
+
+
+def encode_objects(schema, objs) -> bytes:
+    """Кодирует объект или список объектов так же, как FastAPI по схеме."""
+    if isinstance(objs, list):
+        content = [schema.from_orm(obj) for obj in objs]
+    else:
+        content = schema.from_orm(objs)
+    return JSONResponse(jsonable_encoder(content, exclude_none=True)).body
+
+
+async def get_list_body(
+    crud,
+    schema,
+    session: AsyncSession,
+    filters: Dict,
+) -> Tuple[bytes, Dict]:
+    """
+    Тело ответа списка и заголовок с курсором следующей страницы.
+
+    При settings.fast_serialization читаются только поля схемы,
+    и строки кодируются без валидации через схему.
+    """
+    if settings.fast_serialization:
+        fields = get_schema_fields(schema, crud.model)
+        objs = await crud.get_multi_rows(session, fields, **filters)
+        body = encode_rows(fields, objs)
+    else:
+        objs = await crud.get_multi(session, **filters)
+        body = encode_objects(schema, objs)
+    return body, get_next_cursor(objs, filters['limit'])
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.charity_project import charity_project_crud
 from app.models import CharityProject
+from app.services.report_jobs import ReportJob, report_jobs
 
 
 FULL_AMOUNT_ERROR = (
@@ -16,6 +17,7 @@ NAME_EXISTS_ERROR = 'Проект с таким именем уже сущест
 PROJECT_CLOSED_ERROR = 'Закрытый проект нельзя редактировать!'
 PROJECT_DELETE_ERROR = 'В проект были внесены средства, не подлежит удалению!'
 PROJECT_DOES_NOT_EXIST_ERROR = 'Проект {} не найден.'
+REPORT_JOB_DOES_NOT_EXIST_ERROR = 'Задача отчёта {} не найдена.'
 
 
 async def check_name_duplicate(
@@ -32,6 +34,21 @@ async def check_name_duplicate(
         )
 
 
+async def check_charity_project_exists(
+    project_id: int,
+    session: AsyncSession,
+) -> CharityProject:
+    charity_project = await charity_project_crud.get(
+        project_id, session
+    )
+    if charity_project is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=PROJECT_DOES_NOT_EXIST_ERROR.format(project_id)
+        )
+    return charity_project
+
+
 async def check_charity_project_before_update(
     project_id: int,
     session: AsyncSession,
@@ -80,3 +97,13 @@ async def check_charity_project_before_delete(
             detail=PROJECT_DELETE_ERROR
         )
     return charity_project
+
+
+def check_report_job_exists(job_id: str) -> ReportJob:
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=REPORT_JOB_DOES_NOT_EXIST_ERROR.format(job_id)
+        )
+    return job
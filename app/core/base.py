@@ -1,2 +1,4 @@
 from app.core.db import Base  # noqa
-from app.models import CharityProject, Donation, User  # noqa
+from app.models import (  # noqa
+    ChangeVersion, CharityProject, Donation, FundStatistics, Tombstone, User
+)
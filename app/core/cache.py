@@ -0,0 +1,97 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+CACHE_MAX_ENTRIES = 256
+OBJECT_CACHE_MAX_ENTRIES = 1024
+CHANGED_OBJECTS = 'changed_objects'
+CHANGED_MODELS = 'changed_models'
+
+
+class ResponseCache:
+    """
+    Кэш сериализованных ответов, привязанный к версии данных.
+
+    Версия — зафиксированное значение общего счётчика изменений
+    (ChangeVersion), которое запрос читает по первичному ключу. Счётчик
+    увеличивает любая запись проектов и пожертвований, в том числе из
+    других процессов приложения и `ledger --fix`, поэтому ETag одинаков
+    во всех процессах и устаревает сразу после commit.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()
+
+    def clear(self) -> None:
+        self.version = None
+        self.entries.clear()
+
+    @staticmethod
+    def etag(version: int) -> str:
+        return f'"v{version}"'
+
+    def get(self, key: str, version: int) -> Optional[Tuple[bytes, Dict]]:
+        if version != self.version:
+            return None
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, version: int, body: bytes, headers: Dict) -> None:
+        """Сохраняет ответ, прочитанный при версии данных version."""
+        if self.version is None or version > self.version:
+            self.version = version
+            self.entries.clear()
+        elif version < self.version:
+            return
+        self.entries[key] = (body, headers)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class ObjectCache:
+    """
+    LRU-кэш сериализованных объектов по (модели, id), привязанный к версии строки.
+
+    Запись действительна, пока version строки не изменилась. Версию
+    запрос читает по первичному ключу, а её увеличивает любая запись
+    объекта, в том числе из других процессов приложения и
+    `ledger --fix`, поэтому изменённый объект не отдаётся из кэша.
+    """
+
+    def __init__(self, max_entries: int = OBJECT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+    def get(self, model, obj_id: int, version: int) -> Optional[Tuple[bytes, str]]:
+        entry = self.entries.get((model, obj_id))
+        if entry is None or entry[0] != version:
+            return None
+        self.entries.move_to_end((model, obj_id))
+        return entry[1], entry[2]
+
+    def set(self, model, obj_id: int, version: int, body: bytes) -> str:
+        """Сохраняет объект, прочитанный при версии строки version."""
+        etag = self.etag(body)
+        self.entries[(model, obj_id)] = (version, body, etag)
+        self.entries.move_to_end((model, obj_id))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return etag
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+response_cache = ResponseCache()
+object_cache = ObjectCache()
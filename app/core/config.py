@@ -21,6 +21,11 @@ class Settings(BaseSettings):
     auth_provider_x509_cert_url: Optional[str] = None
     client_x509_cert_url: Optional[str] = None
     email: Optional[str] = None
+    google_discovery_dir: Optional[str] = '.google_discovery'
+    google_warm_up: bool = False
+    investment_engine: str = 'loop'
+    investment_mode: str = 'sync'
+    fast_serialization: bool = False
 
     class Config:
         env_file = '.env'
@@ -1,5 +1,10 @@
+import json
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
 from aiogoogle import Aiogoogle
 from aiogoogle.auth.creds import ServiceAccountCreds
+from aiogoogle.resource import GoogleAPI
 
 from app.core.config import settings
 
@@ -22,10 +27,91 @@ INFO = {
     'client_x509_cert_url': settings.client_x509_cert_url
 }
 
+APIS = (('sheets', 'v4'), ('drive', 'v3'))
+DISCOVERY_FILE = '{api_name}_{api_version}.json'
+
 
 cred = ServiceAccountCreds(scopes=SCOPES, **INFO)
 
 
+class GoogleClientManager:
+    """
+    Общий клиент Google API процесса.
+
+    Документы discovery загружаются один раз и сохраняются в cache_dir,
+    после перезапуска они читаются с диска. Токен сервисного аккаунта
+    хранится в общем объекте Aiogoogle и запрашивается заново только
+    после истечения срока действия.
+    """
+
+    def __init__(
+        self,
+        creds: ServiceAccountCreds = cred,
+        cache_dir: Optional[str] = None,
+    ):
+        self.aiogoogle = Aiogoogle(service_account_creds=creds)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.services: Dict[Tuple[str, str], GoogleAPI] = {}
+
+    def get_cache_path(self, api_name: str, api_version: str) -> Path:
+        return self.cache_dir / DISCOVERY_FILE.format(
+            api_name=api_name, api_version=api_version
+        )
+
+    def load_document(self, api_name: str, api_version: str) -> Optional[Dict]:
+        if self.cache_dir is None:
+            return None
+        path = self.get_cache_path(api_name, api_version)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save_document(
+        self,
+        api_name: str,
+        api_version: str,
+        document: Dict,
+    ) -> None:
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.get_cache_path(api_name, api_version)
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(document))
+        temporary.replace(path)
+
+    async def download_document(self, api_name: str, api_version: str) -> Dict:
+        async with Aiogoogle() as client:
+            service = await client.discover(api_name, api_version)
+        return service.discovery_document
+
+    async def discover(self, api_name: str, api_version: str) -> GoogleAPI:
+        service = self.services.get((api_name, api_version))
+        if service is not None:
+            return service
+        document = self.load_document(api_name, api_version)
+        if document is None:
+            document = await self.download_document(api_name, api_version)
+            self.save_document(api_name, api_version, document)
+        service = GoogleAPI(document)
+        self.services[(api_name, api_version)] = service
+        return service
+
+    async def as_service_account(self, *requests, **kwargs):
+        return await self.aiogoogle.as_service_account(*requests, **kwargs)
+
+    async def warm_up(self) -> None:
+        """Загружает документы discovery и токен сервисного аккаунта."""
+        for api_name, api_version in APIS:
+            await self.discover(api_name, api_version)
+        await self.aiogoogle.service_account_manager.refresh()
+
+
+google_client_manager = GoogleClientManager(
+    cache_dir=settings.google_discovery_dir
+)
+
+
 async def get_service():
-    async with Aiogoogle(service_account_creds=cred) as aiogoogle:
-        yield aiogoogle
+    async with google_client_manager.aiogoogle:
+        yield google_client_manager
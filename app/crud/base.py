@@ -1,16 +1,26 @@
-from typing import Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
 
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import inspect, insert, literal, select, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from app.models import User
+from app.models import Tombstone, User
+from app.models.change_version import committed_version_query
+from app.services.statistics import add_deltas, get_object_deltas
+
+
+STREAM_CHUNK_SIZE = 100
+INSERT_MAX_PARAMETERS = 30000
 
 
 class CRUDBase:
 
     def __init__(self, model):
         self.model = model
+        self.columns = frozenset(
+            column.key for column in inspect(model).column_attrs
+        )
 
     async def get(
         self,
@@ -24,54 +34,301 @@ class CRUDBase:
         )
         return db_obj.scalars().first()
 
+    async def get_version(
+        self,
+        obj_id: int,
+        session: AsyncSession,
+    ) -> Optional[int]:
+        version = await session.execute(
+            select(self.model.version).where(self.model.id == obj_id)
+        )
+        return version.scalar()
+
+    def get_multi_query(
+        self,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        fully_invested: Optional[bool] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        user_id: Optional[int] = None,
+    ):
+        """Запрос страницы объектов в порядке id после курсора after_id."""
+        query = select(self.model).order_by(self.model.id)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        if fully_invested is not None:
+            query = query.where(
+                self.model.fully_invested if fully_invested
+                else ~self.model.fully_invested
+            )
+        if created_from is not None:
+            query = query.where(self.model.create_date >= created_from)
+        if created_to is not None:
+            query = query.where(self.model.create_date < created_to)
+        if user_id is not None:
+            query = query.where(self.model.user_id == user_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
     async def get_multi(
         self,
-        session: AsyncSession
+        session: AsyncSession,
+        **filters
     ):
-        db_objs = await session.execute(select(self.model))
+        db_objs = await session.execute(self.get_multi_query(**filters))
         return db_objs.scalars().all()
 
-    async def get_not_invested(
+    def get_changes_query(self, since: int, until: int):
+        return select(self.model).where(
+            self.model.version > since,
+            self.model.version <= until,
+        ).order_by(self.model.version, self.model.id)
+
+    def get_deletions_query(self, since: int, until: int):
+        return select(
+            Tombstone.object_id.label('id'),
+            Tombstone.version,
+            Tombstone.deleted_at.label('updated_at'),
+            literal(True).label('deleted'),
+        ).where(
+            Tombstone.table_name == self.model.__tablename__,
+            Tombstone.version > since,
+            Tombstone.version <= until,
+        ).order_by(Tombstone.version, Tombstone.id)
+
+    async def get_changes(
+        self,
+        session: AsyncSession,
+        since: int = 0,
+        limit: Optional[int] = None,
+    ) -> List:
+        """
+        Объекты, изменённые после версии since, и записи об удалённых
+        объектах в порядке version, id.
+
+        Читаются только версии не выше зафиксированного значения счётчика
+        версий, поэтому транзакция, которая ещё не завершилась, не окажется
+        позади выданного курсора. Страница не разрывает объекты с одной
+        версией: последняя версия страницы дочитывается целиком, даже
+        сверх limit.
+        """
+        until = (await session.execute(committed_version_query())).scalar()
+        if limit is not None:
+            versions = union_all(
+                select(self.model.version).where(
+                    self.model.version > since, self.model.version <= until
+                ),
+                select(Tombstone.version).where(
+                    Tombstone.table_name == self.model.__tablename__,
+                    Tombstone.version > since,
+                    Tombstone.version <= until,
+                ),
+            ).subquery()
+            last_version = await session.execute(
+                select(versions.c.version).order_by(
+                    versions.c.version
+                ).offset(limit - 1).limit(1)
+            )
+            until = last_version.scalar() or until
+        db_objs = await session.execute(self.get_changes_query(since, until))
+        deletions = await session.execute(
+            self.get_deletions_query(since, until)
+        )
+        return sorted(
+            [*db_objs.scalars(), *deletions],
+            key=lambda obj: (obj.version, obj.id),
+        )
+
+    def get_multi_rows_query(
+        self,
+        fields: Sequence[str],
+        **filters
+    ):
+        return self.get_multi_query(**filters).with_only_columns(
+            *(getattr(self.model, field) for field in fields)
+        )
+
+    async def get_multi_rows(
+        self,
+        session: AsyncSession,
+        fields: Sequence[str],
+        **filters
+    ):
+        """Только поля fields объектов с фильтрами get_multi."""
+        rows = await session.execute(
+            self.get_multi_rows_query(fields, **filters)
+        )
+        return rows.all()
+
+    async def stream_multi(
+        self,
+        session: AsyncSession,
+        fields: Sequence[str],
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        **filters
+    ):
+        """
+        Поля объектов с фильтрами get_multi, читаемые порциями по chunk_size.
+
+        Результат нужно закрыть после использования.
+        """
+        return await session.stream(
+            self.get_multi_rows_query(fields, **filters).execution_options(
+                yield_per=chunk_size
+            )
+        )
+
+    async def stream_not_invested(
         self,
         session: AsyncSession
     ):
-        investments = await session.execute(
-            select(self).where(~self.fully_invested)
+        """
+        Открытые объекты в порядке create_date, id без полной выборки.
+
+        Строки читаются с сервера порциями по STREAM_CHUNK_SIZE;
+        результат нужно закрыть после использования.
+        """
+        return await session.stream_scalars(
+            select(self).where(
+                ~self.fully_invested
+            ).order_by(
+                self.create_date, self.id
+            ).execution_options(yield_per=STREAM_CHUNK_SIZE)
         )
-        return investments.scalars().all()
 
     async def create(
         self,
         obj_in,
         session: AsyncSession,
-        user: Optional[User] = None
+        user: Optional[User] = None,
+        commit: bool = True,
     ):
         obj_in_data = obj_in.dict()
         if user is not None:
             obj_in_data['user_id'] = user.id
         db_obj = self.model(**obj_in_data)
         session.add(db_obj)
+        if not commit:
+            await session.flush()
+            return db_obj
         await session.commit()
         await session.refresh(db_obj)
         return db_obj
 
+    async def create_multi(
+        self,
+        objs_in: List,
+        session: AsyncSession,
+        user: Optional[User] = None
+    ):
+        """
+        Создаёт объекты многострочными INSERT без загрузки из БД.
+
+        id берутся из RETURNING, а в SQLite без него - из lastrowid:
+        строки одного INSERT получают идущие подряд rowid. Объекты
+        добавляются в сессию как сохранённые; commit выполняет
+        вызывающий код.
+        """
+        now = datetime.now()
+        rows = []
+        for obj_in in objs_in:
+            row = dict(
+                obj_in.dict(),
+                invested_amount=0,
+                fully_invested=False,
+                create_date=now,
+                close_date=None,
+                updated_at=now,
+            )
+            if user is not None:
+                row['user_id'] = user.id
+            rows.append(row)
+        connection = await session.connection()
+        dialect = connection.dialect
+        if not dialect.full_returning and dialect.name != 'sqlite':
+            db_objs = [self.model(**row) for row in rows]
+            session.add_all(db_objs)
+            await session.flush()
+            return db_objs
+        table = self.model.__table__
+        chunk_size = max(INSERT_MAX_PARAMETERS // len(rows[0]), 1)
+        db_objs = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            statement = insert(table).values(chunk)
+            if dialect.full_returning:
+                result = await session.execute(statement.returning(table.c.id))
+                ids = sorted(result.scalars())
+            else:
+                result = await session.execute(statement)
+                ids = range(
+                    result.lastrowid - len(chunk) + 1, result.lastrowid + 1
+                )
+            for obj_id, row in zip(ids, chunk):
+                db_obj = self.model(id=obj_id, **row)
+                make_transient_to_detached(db_obj)
+                session.add(db_obj)
+                add_deltas(session, **get_object_deltas(db_obj, 1))
+                db_objs.append(db_obj)
+        return db_objs
+
     async def update(
         self,
         db_obj,
         obj_in,
         session: AsyncSession,
+        commit: bool = True,
     ):
-        obj_data = jsonable_encoder(db_obj)
-        update_data = obj_in.dict(exclude_unset=True)
-
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in obj_in.dict(exclude_unset=True).items():
+            if field in self.columns:
+                setattr(db_obj, field, value)
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
+        if commit:
+            await session.commit()
         return db_obj
 
+    async def bulk_update(
+        self,
+        ids: Sequence[int],
+        values: Dict,
+        session: AsyncSession,
+        conditions: Sequence = (),
+        returning: Sequence = (),
+    ):
+        """
+        Обновляет объекты с указанными id, удовлетворяющие conditions,
+        одним UPDATE без загрузки в сессию.
+
+        Возвращает столбцы returning изменённых строк в порядке id, а без
+        returning - число изменённых строк; commit выполняет вызывающий код.
+        Без поддержки RETURNING строки перечитываются по версии изменений
+        транзакции: после UPDATE она держит блокировку счётчика версий.
+        """
+        unknown = set(values) - self.columns
+        if unknown:
+            raise ValueError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+        statement = update(self.model).where(
+            self.model.id.in_(ids), *conditions
+        ).values(values).execution_options(synchronize_session=False)
+        if not returning:
+            return (await session.execute(statement)).rowcount
+        connection = await session.connection()
+        if connection.dialect.full_returning:
+            rows = await session.execute(statement.returning(*returning))
+            return sorted(rows.all(), key=lambda row: row.id)
+        if not (await session.execute(statement)).rowcount:
+            return []
+        rows = await session.execute(
+            select(*returning).where(
+                self.model.id.in_(ids),
+                self.model.version == committed_version_query(
+                ).scalar_subquery(),
+            ).order_by(self.model.id)
+        )
+        return rows.all()
+
     async def remove(
         self,
         db_obj,
@@ -1,12 +1,46 @@
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import Float, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 
 from app.crud.base import CRUDBase
 from app.models.charity_project import CharityProject
 
 
+class duration_seconds(FunctionElement):
+    """
+    Длительность между двумя датами в секундах с дробной частью.
+
+    SQLite хранит время julianday с точностью до миллисекунд,
+    поэтому длительность в нём округляется до миллисекунд.
+    """
+    type = Float()
+    name = 'duration_seconds'
+    inherit_cache = True
+
+
+@compiles(duration_seconds)
+def compile_duration_seconds(element, compiler, **kw):
+    start, end = element.clauses
+    return compiler.process(
+        cast(func.extract('epoch', end - start), Float), **kw
+    )
+
+
+@compiles(duration_seconds, 'sqlite')
+def compile_sqlite_duration_seconds(element, compiler, **kw):
+    start, end = element.clauses
+    return compiler.process(
+        func.round(
+            (func.julianday(end) - func.julianday(start)) * 86400, 3
+        ),
+        **kw
+    )
+
+
 class CRUDCharityProject(CRUDBase):
 
     @staticmethod
@@ -22,13 +56,74 @@ class CRUDCharityProject(CRUDBase):
         return project_id.scalars().first()
 
     @staticmethod
-    async def get_fully_invested_projects(
+    async def get_projects_by_completion_rate(
         session: AsyncSession,
+        limit: Optional[int] = None,
+        closed_from: Optional[datetime] = None,
+        closed_to: Optional[datetime] = None,
+    ) -> List[Tuple[str, timedelta, str]]:
+        """
+        Название, время сбора и описание закрытых проектов,
+        от быстрее всего закрытых к медленным.
+        """
+        duration = duration_seconds(
+            CharityProject.create_date, CharityProject.close_date
+        )
+        query = select(
+            CharityProject.name, duration, CharityProject.description
+        ).where(
+            CharityProject.fully_invested
+        ).order_by(duration, CharityProject.id).limit(limit)
+        if closed_from is not None:
+            query = query.where(CharityProject.close_date >= closed_from)
+        if closed_to is not None:
+            query = query.where(CharityProject.close_date < closed_to)
+        projects = await session.execute(query)
+        return [
+            (name, timedelta(seconds=seconds), description)
+            for name, seconds, description in projects
+        ]
+
+    async def bulk_update_editable(
+        self,
+        ids: List[int],
+        values: Dict,
+        session: AsyncSession,
+        full_amount: Optional[int] = None,
+        close: bool = False,
     ):
+        """
+        Изменяет открытые проекты из ids, которые можно изменить, и
+        возвращает их id, вложенную сумму и fully_invested после UPDATE.
+
+        При новой сумме full_amount вложенная сумма не должна её превышать,
+        закрыть можно только проект, в который уже вложены средства.
+        Условия проверяются в самом UPDATE, поэтому средства, вложенные
+        другой транзакцией до него, не обходят проверку.
+        """
+        conditions = [~CharityProject.fully_invested]
+        if full_amount is not None:
+            conditions.append(CharityProject.invested_amount <= full_amount)
+        if close:
+            conditions.append(CharityProject.invested_amount > 0)
+        return await self.bulk_update(
+            ids, values, session, conditions, returning=(
+                CharityProject.id,
+                CharityProject.invested_amount,
+                CharityProject.fully_invested,
+            )
+        )
+
+    @staticmethod
+    async def get_open_by_ids(
+        ids: List[int],
+        session: AsyncSession,
+    ) -> List[CharityProject]:
         projects = await session.execute(
             select(CharityProject).where(
-                CharityProject.fully_invested
-            )
+                CharityProject.id.in_(ids),
+                ~CharityProject.fully_invested,
+            ).order_by(CharityProject.create_date, CharityProject.id)
         )
         return projects.scalars().all()
 
@@ -1,6 +1,6 @@
-from typing import List
+from typing import Dict, List
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
@@ -19,5 +19,23 @@ class CRUDDonation(CRUDBase):
         )
         return donations.scalars().all()
 
+    async def get_user_summary(
+        self, session: AsyncSession, user: User
+    ) -> Dict:
+        total_amount = func.coalesce(func.sum(Donation.full_amount), 0)
+        invested_amount = func.coalesce(func.sum(Donation.invested_amount), 0)
+        summary = await session.execute(
+            select(
+                func.count(Donation.id).label('count'),
+                total_amount.label('total_amount'),
+                invested_amount.label('invested_amount'),
+                (total_amount - invested_amount).label('remaining_amount'),
+                func.max(Donation.create_date).label('last_donation_date'),
+            ).where(
+                Donation.user_id == user.id
+            )
+        )
+        return dict(summary.one()._mapping)
+
 
 donation_crud = CRUDDonation(Donation)
@@ -2,7 +2,12 @@ from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
-from app.core.init_db import create_first_superuser
+from app.core.google_client import google_client_manager
+from app.core.init_db import create_first_superuser, get_async_session_context
+from app.services.investment import POOL_ENGINE
+from app.services.investment_queue import QUEUE_MODE, investment_queue
+from app.services.open_pool import open_pool
+from app.services.report_jobs import report_jobs
 
 
 app = FastAPI(
@@ -17,3 +22,16 @@ app.include_router(main_router)
 @app.on_event('startup')
 async def startup():
     await create_first_superuser()
+    if settings.investment_engine == POOL_ENGINE:
+        async with get_async_session_context() as session:
+            await open_pool.warm_up(session)
+    if settings.investment_mode == QUEUE_MODE:
+        investment_queue.start()
+    if settings.google_warm_up:
+        await google_client_manager.warm_up()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    await investment_queue.stop()
+    await report_jobs.stop()
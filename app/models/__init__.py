@@ -1,3 +1,6 @@
 from .charity_project import CharityProject # noqa
 from .donation import Donation # noqa
 from .user import User # noqa
+from .statistics import FundStatistics # noqa
+from .change_version import ChangeVersion # noqa
+from .tombstone import Tombstone # noqa
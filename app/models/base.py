@@ -1,9 +1,11 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, text
+from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.schema import CheckConstraint
 
 from app.core.db import Base
+from app.models.change_version import next_version
 
 
 class BaseModel(Base):
@@ -14,6 +16,11 @@ class BaseModel(Base):
     fully_invested = Column(Boolean, default=False)
     create_date = Column(DateTime, default=datetime.now)
     close_date = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    version = Column(
+        Integer, nullable=False, default=next_version, onupdate=next_version
+    )
 
     def __repr__(self) -> str:
         return (
@@ -23,6 +30,26 @@ class BaseModel(Base):
             f'create_date={self.create_date} - close_date={self.close_date}'
         )
 
-    __table_args__ = (
-        CheckConstraint('full_amount > 0', name='full_amount_positive'),
-    )
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            CheckConstraint('full_amount > 0', name='full_amount_positive'),
+            Index(f'ix_{cls.__tablename__}_create_date', 'create_date'),
+            Index(f'ix_{cls.__tablename__}_version', 'version', 'id'),
+            Index(
+                f'ix_{cls.__tablename__}_open_id', 'id',
+                sqlite_where=text('fully_invested = 0'),
+                postgresql_where=text('NOT fully_invested'),
+            ),
+            Index(
+                f'ix_{cls.__tablename__}_closed_id', 'id',
+                sqlite_where=text('fully_invested = 1'),
+                postgresql_where=text('fully_invested'),
+            ),
+            Index(
+                f'ix_{cls.__tablename__}_open_create_date',
+                'create_date', 'id',
+                sqlite_where=text('fully_invested = 0'),
+                postgresql_where=text('NOT fully_invested'),
+            ),
+        )
@@ -0,0 +1,78 @@
+from typing import Optional
+
+from sqlalchemy import DDL, Column, Integer, event, select, text, update
+
+from app.core.db import Base
+
+
+CHANGE_VERSION_ID = 1
+VERSION_TRANSACTION = 'version_transaction'
+SQLITE_RETURNING_VERSION = (3, 35)
+ALLOCATE_VERSION = text(
+    f'UPDATE changeversion SET value = value + 1 '
+    f'WHERE id = {CHANGE_VERSION_ID} RETURNING value'
+)
+
+
+class ChangeVersion(Base):
+    """
+    Общий счётчик версий изменений проектов и пожертвований.
+
+    Транзакция увеличивает счётчик при первой записи и держит блокировку
+    строки до commit, поэтому версии фиксируются в порядке возрастания:
+    строки с версией не выше зафиксированного значения счётчика уже
+    видны читателям, и лента изменений не пропускает поздние commit.
+    """
+    value = Column(Integer, nullable=False, default=0)
+
+
+event.listen(
+    ChangeVersion.__table__,
+    'after_create',
+    DDL(
+        f'INSERT INTO changeversion (id, value) '
+        f'VALUES ({CHANGE_VERSION_ID}, 0)'
+    ),
+)
+
+
+def supports_returning(dialect) -> bool:
+    if dialect.name == 'sqlite':
+        return dialect.server_version_info >= SQLITE_RETURNING_VERSION
+    return dialect.full_returning
+
+
+def next_version(context) -> Optional[int]:
+    """
+    Версия изменений текущей транзакции, одна на все её записи.
+
+    Без контекста выполнения (значение по умолчанию запрашивают заранее)
+    возвращает None, и версия назначится при INSERT.
+    """
+    if context is None:
+        return None
+    connection = context.connection
+    transaction = connection.get_transaction()
+    allocated = connection.info.get(VERSION_TRANSACTION)
+    if allocated is not None and allocated[0] is transaction:
+        return allocated[1]
+    if supports_returning(connection.dialect):
+        version = connection.execute(ALLOCATE_VERSION).scalar_one()
+    else:
+        counter = ChangeVersion.__table__
+        connection.execute(
+            update(counter).where(
+                counter.c.id == CHANGE_VERSION_ID
+            ).values(value=counter.c.value + 1)
+        )
+        version = connection.execute(
+            select(counter.c.value).where(counter.c.id == CHANGE_VERSION_ID)
+        ).scalar_one()
+    connection.info[VERSION_TRANSACTION] = (transaction, version)
+    return version
+
+
+def committed_version_query():
+    return select(ChangeVersion.value).where(
+        ChangeVersion.id == CHANGE_VERSION_ID
+    )
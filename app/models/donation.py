@@ -1,9 +1,18 @@
-from sqlalchemy import Column, ForeignKey, Integer, Text
+from sqlalchemy import Column, ForeignKey, Index, Integer, Text
+from sqlalchemy.ext.declarative import declared_attr
 
 from app.models.base import BaseModel
 
 
 class Donation(BaseModel):
+
+    @declared_attr
+    def __table_args__(cls):
+        return (
+            *super().__table_args__,
+            Index('ix_donation_user_id', 'user_id', 'id'),
+        )
+
     user_id = Column(Integer, ForeignKey('user.id'))
     comment = Column(Text)
 
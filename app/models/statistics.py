@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer
+
+from app.core.db import Base
+
+
+class FundStatistics(Base):
+    donations_count = Column(Integer, default=0, nullable=False)
+    donation_amount = Column(Integer, default=0, nullable=False)
+    invested_amount = Column(Integer, default=0, nullable=False)
+    projects_count = Column(Integer, default=0, nullable=False)
+    open_projects = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f'donations_count={self.donations_count} - '
+            f'donation_amount={self.donation_amount} - '
+            f'invested_amount={self.invested_amount} - '
+            f'projects_count={self.projects_count} - '
+            f'open_projects={self.open_projects}'
+        )
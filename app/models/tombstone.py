@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, event
+from sqlalchemy.orm import Session
+
+from app.core.db import Base
+from app.models.base import BaseModel
+from app.models.change_version import next_version
+
+
+class Tombstone(Base):
+    """Запись об удалённом объекте для ленты изменений."""
+
+    __table_args__ = (
+        Index('ix_tombstone_table_version', 'table_name', 'version', 'id'),
+    )
+
+    table_name = Column(String(100), nullable=False)
+    object_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=next_version)
+    deleted_at = Column(DateTime, default=datetime.now)
+
+
+@event.listens_for(Session, 'before_flush')
+def add_tombstones(session, flush_context, instances):
+    for obj in session.deleted:
+        if isinstance(obj, BaseModel):
+            session.add(
+                Tombstone(table_name=obj.__tablename__, object_id=obj.id)
+            )
@@ -1,7 +1,14 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from pydantic import BaseModel, Extra, Field, PositiveInt
+from pydantic import (
+    BaseModel, Extra, Field, PositiveInt, conlist, root_validator
+)
+
+
+BULK_UPDATE_MAX_SIZE = 1000
+BULK_CLOSE_ERROR = 'Нельзя одновременно закрыть проекты и изменить сумму!'
+BULK_EMPTY_ERROR = 'Не указано ни одного изменения!'
 
 
 class CharityProjectBase(BaseModel):
@@ -33,3 +40,44 @@ class CharityProjectDB(CharityProjectBase):
 
     class Config:
         orm_mode = True
+
+
+class CharityProjectCreateDB(CharityProjectDB):
+    investment_status: Optional[str]
+
+
+class CharityProjectChange(CharityProjectDB):
+    updated_at: datetime
+    version: int
+
+
+class CharityProjectDuration(BaseModel):
+    name: str
+    duration: timedelta
+    description: str
+
+
+class CharityProjectBulkUpdate(BaseModel):
+    ids: conlist(PositiveInt, min_items=1, max_items=BULK_UPDATE_MAX_SIZE)
+    description: Optional[str]
+    full_amount: Optional[PositiveInt]
+    close: bool = False
+
+    class Config:
+        min_anystr_length = 1
+        extra = Extra.forbid
+
+    @root_validator(skip_on_failure=True)
+    def check_changes(cls, values):
+        if values['close'] and values['full_amount'] is not None:
+            raise ValueError(BULK_CLOSE_ERROR)
+        if not values['close'] and (
+            values['full_amount'] is None and values['description'] is None
+        ):
+            raise ValueError(BULK_EMPTY_ERROR)
+        return values
+
+
+class CharityProjectBulkResult(BaseModel):
+    updated: List[int]
+    skipped: List[int]
@@ -1,7 +1,10 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, PositiveInt
+from pydantic import BaseModel, PositiveInt, conlist
+
+
+BATCH_MAX_SIZE = 10000
 
 
 class DonationBase(BaseModel):
@@ -13,10 +16,16 @@ class DonationCreate(DonationBase):
     pass
 
 
+DonationBatchCreate = conlist(
+    DonationCreate, min_items=1, max_items=BATCH_MAX_SIZE
+)
+
+
 class DonationDB(DonationBase):
     comment: Optional[str] = None
     id: int
     create_date: datetime
+    investment_status: Optional[str]
 
     class Config:
         orm_mode = True
@@ -27,3 +36,16 @@ class DonationGetAll(DonationDB):
     invested_amount: int
     fully_invested: bool
     close_date: Optional[datetime]
+
+
+class DonationChange(DonationGetAll):
+    updated_at: datetime
+    version: int
+
+
+class DonationSummary(BaseModel):
+    count: int
+    total_amount: int
+    invested_amount: int
+    remaining_amount: int
+    last_donation_date: Optional[datetime]
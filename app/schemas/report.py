@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ReportJobDB(BaseModel):
+    id: str
+    status: str
+    progress: int
+    spreadsheet_url: Optional[str]
+    error: Optional[str]
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class FundStatisticsDB(BaseModel):
+    donations_count: int
+    donation_amount: int
+    invested_amount: int
+    donation_balance: int
+    projects_count: int
+    open_projects: int
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class TombstoneDB(BaseModel):
+    id: int
+    version: int
+    updated_at: datetime
+    deleted: bool
+
+    class Config:
+        orm_mode = True
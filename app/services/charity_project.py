@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.charity_project import charity_project_crud
+from app.models import CharityProject
+from app.schemas.charity_project import CharityProjectBulkUpdate
+from app.services.funding_events import note_funding
+from app.services.investment import batch_invest
+from app.services.open_pool import open_pool
+from app.services.statistics import add_deltas
+
+
+async def bulk_update_projects(
+    obj_in: CharityProjectBulkUpdate,
+    session: AsyncSession,
+) -> Dict:
+    """
+    Изменяет несколько проектов одним UPDATE.
+
+    close=True закрывает проекты на уже вложенной сумме. Новая сумма
+    full_amount закрывает проекты, в которые она уже вложена, а
+    проекты, оставшиеся открытыми, получают свободные пожертвования.
+    Закрытые проекты и проекты, в которые вложено больше новой суммы,
+    пропускаются. Изменённые и закрытые проекты, счётчики статистики и
+    события финансирования берутся из строк, изменённых UPDATE, так как
+    объекты не загружаются в сессию.
+    """
+    now = datetime.now()
+    values = {}
+    if obj_in.description is not None:
+        values['description'] = obj_in.description
+    if obj_in.close:
+        values.update(
+            full_amount=CharityProject.invested_amount,
+            fully_invested=True,
+            close_date=now,
+        )
+    elif obj_in.full_amount is not None:
+        reached = CharityProject.invested_amount >= obj_in.full_amount
+        values.update(
+            full_amount=obj_in.full_amount,
+            fully_invested=reached,
+            close_date=case((reached, now), else_=None),
+        )
+    projects = await charity_project_crud.bulk_update_editable(
+        obj_in.ids, values, session, obj_in.full_amount, obj_in.close
+    )
+    updated = [project.id for project in projects]
+    if not updated:
+        return dict(updated=[], skipped=sorted(set(obj_in.ids)))
+    closed = [project for project in projects if project.fully_invested]
+    open_pool.invalidate(CharityProject)
+    add_deltas(session, open_projects=-len(closed))
+    for project in closed:
+        note_funding(session, project.id, project.invested_amount, True)
+    if obj_in.full_amount is not None:
+        await batch_invest(
+            await charity_project_crud.get_open_by_ids(updated, session),
+            session
+        )
+    await session.commit()
+    return dict(
+        updated=updated,
+        skipped=sorted(set(obj_in.ids) - set(updated)),
+    )
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+NDJSON_FORMAT = 'ndjson'
+CSV_FORMAT = 'csv'
+MEDIA_TYPES = {
+    NDJSON_FORMAT: 'application/x-ndjson',
+    CSV_FORMAT: 'text/csv',
+}
+EXPORT_CHUNK_SIZE = 1000
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+PROJECT_EXPORT_FIELDS = (
+    'id', 'name', 'description', 'full_amount', 'invested_amount',
+    'fully_invested', 'create_date', 'close_date',
+)
+DONATION_EXPORT_FIELDS = (
+    'id', 'user_id', 'comment', 'full_amount', 'invested_amount',
+    'fully_invested', 'create_date', 'close_date',
+)
+
+
+def export_headers(name: str, export_format: str, gzip: bool = False) -> dict:
+    headers = {
+        'Content-Disposition': f'attachment; filename="{name}.{export_format}"'
+    }
+    if gzip:
+        headers['Content-Encoding'] = 'gzip'
+    return headers
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_lines(fields: Sequence[str], rows: Iterable) -> str:
+    """Строки выгрузки в NDJSON; пустые поля пропускаются, как в списках."""
+    return ''.join(
+        json.dumps(
+            {
+                field: encode_value(value)
+                for field, value in zip(fields, row) if value is not None
+            },
+            ensure_ascii=False,
+        ) + '\n'
+        for row in rows
+    )
+
+
+def csv_lines(rows: Iterable) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [encode_value(value) for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_rows(
+    crud,
+    session: AsyncSession,
+    fields: Sequence[str],
+    export_format: str = NDJSON_FORMAT,
+    gzip: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    **filters
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка объектов с фильтрами списка без загрузки всей таблицы.
+
+    Строки читаются из БД порциями по chunk_size и сразу отдаются
+    клиенту; при gzip=True поток сжимается по мере чтения.
+    """
+    compressor = zlib.compressobj(wbits=GZIP_WBITS) if gzip else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if export_format == CSV_FORMAT:
+        yield encode(csv_lines([fields]))
+    result = await crud.stream_multi(session, fields, chunk_size, **filters)
+    try:
+        async for rows in result.partitions():
+            if export_format == CSV_FORMAT:
+                chunk = encode(csv_lines(rows))
+            else:
+                chunk = encode(ndjson_lines(fields, rows))
+            if chunk:
+                yield chunk
+    finally:
+        await result.close()
+    if compressor:
+        yield compressor.flush()
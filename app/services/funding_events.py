@@ -0,0 +1,114 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import CharityProject
+
+
+SUBSCRIBER_BUFFER_SIZE = 1000
+KEEPALIVE_INTERVAL = 15
+FUNDING_EVENTS = 'funding_events'
+KEEPALIVE_MESSAGE = ': keep-alive\n\n'
+
+
+class FundingBroker:
+    """
+    Рассылка изменений финансирования проектов подписчикам процесса.
+
+    У каждого подписчика своя очередь на SUBSCRIBER_BUFFER_SIZE событий.
+    События несут текущее состояние проекта, поэтому при переполнении
+    медленный подписчик теряет самые старые из них, не задерживая
+    остальных.
+    """
+
+    def __init__(self, buffer_size: int = SUBSCRIBER_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.subscribers = set()
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        queue = asyncio.Queue(maxsize=self.buffer_size)
+        self.subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self.subscribers.discard(queue)
+
+    def publish(self, events: List[Dict]) -> None:
+        for queue in self.subscribers:
+            for item in events:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(item)
+
+
+funding_broker = FundingBroker()
+
+
+def note_funding(
+    session,
+    project_id: int,
+    invested_amount: int,
+    fully_invested: bool,
+) -> None:
+    """Запоминает состояние проекта для рассылки после commit."""
+    if not funding_broker.subscribers:
+        return
+    session.info.setdefault(FUNDING_EVENTS, {})[project_id] = dict(
+        project_id=project_id,
+        invested_amount=invested_amount,
+        fully_invested=fully_invested,
+    )
+
+
+def format_event(item: Dict) -> str:
+    return f'data: {json.dumps(item)}\n\n'
+
+
+async def stream_funding_events(
+    keepalive: float = KEEPALIVE_INTERVAL,
+):
+    """Поток server-sent events с изменениями финансирования проектов."""
+    with funding_broker.subscribe() as queue:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE_MESSAGE
+                continue
+            yield format_event(item)
+
+
+@event.listens_for(Session, 'after_flush')
+def collect_funding(session, flush_context):
+    if not funding_broker.subscribers:
+        return
+    for project in (*session.new, *session.dirty):
+        if not isinstance(project, CharityProject):
+            continue
+        state = inspect(project).attrs
+        if (
+            project in session.new or
+            state.invested_amount.history.added or
+            state.fully_invested.history.added
+        ):
+            note_funding(
+                session, project.id,
+                project.invested_amount or 0, bool(project.fully_invested)
+            )
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_funding(session):
+    events = session.info.pop(FUNDING_EVENTS, None)
+    if events:
+        funding_broker.publish(list(events.values()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def reset_funding(session):
+    session.info.pop(FUNDING_EVENTS, None)
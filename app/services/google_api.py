@@ -1,31 +1,27 @@
 import copy
+import json
 from datetime import datetime
 from http import HTTPStatus
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple
 
-from aiogoogle import Aiogoogle
 from fastapi import HTTPException
 
 from app.core.config import settings
+from app.core.google_client import GoogleClientManager
 
 
-COLUMN = 11
-ROW = 100
 TITLE = 'Отчет на {}'
+SHEET_TITLE = 'Лист{}'
+SHEET_ROWS = 5000
+BATCH_UPDATE_ROWS = 20000
+BATCH_UPDATE_BYTES = 2 * 1024 * 1024
+MAX_CELLS = 10000000
 
 SPREADSHEET_BODY = dict(
     properties=dict(
         locale='ru_RU',
     ),
-    sheets=[dict(properties=dict(
-        sheetType='GRID',
-        sheetId=0,
-        title='Лист1',
-        gridProperties=dict(
-            rowCount=ROW,
-            columnCount=COLUMN,
-        )
-    ))]
+    sheets=[],
 )
 HEADER = [
     ['Отчет от', ''],
@@ -35,13 +31,123 @@ HEADER = [
 
 SPREADSHEET_SIZE_ERROR = (
     'Количество передаваемых данных не помещается в таблице. '
-    'Вы передаете {my_row} строк {my_column} столбцов. '
-    'Размер таблицы: {row} строк {column} столбцов.'
+    'Вы передаете {cells} ячеек, максимальный размер таблицы: {max_cells}.'
 )
 
 
+def get_report_sheets(
+    projects: List[Tuple],
+    now_date_time: str,
+    sheet_rows: int = SHEET_ROWS,
+) -> List[List[List[str]]]:
+    """
+    Разбивает отчёт на листы по sheet_rows строк проектов.
+
+    projects - упорядоченные строки (название, время сбора, описание),
+    каждый лист начинается с заголовка отчёта.
+    """
+    header = copy.deepcopy(HEADER)
+    header[0][1] = str(now_date_time)
+    rows = [list(map(str, fields)) for fields in projects]
+    return [
+        [*header, *rows[start:start + sheet_rows]]
+        for start in range(0, max(len(rows), 1), sheet_rows)
+    ]
+
+
+def get_sheet_size(sheet: List[List[str]]) -> Tuple[int, int]:
+    return len(sheet), max(len(row) for row in sheet)
+
+
+def get_spreadsheet_body(sheets: List[List[List[str]]]) -> Dict:
+    """Тело создания таблицы с листами по размеру данных."""
+    cells = sum(rows * columns for rows, columns in map(get_sheet_size, sheets))
+    if cells > MAX_CELLS:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=SPREADSHEET_SIZE_ERROR.format(
+                cells=cells, max_cells=MAX_CELLS
+            ),
+        )
+    spreadsheet_body = copy.deepcopy(SPREADSHEET_BODY)
+    for number, sheet in enumerate(sheets):
+        rows, columns = get_sheet_size(sheet)
+        spreadsheet_body['sheets'].append(dict(properties=dict(
+            sheetType='GRID',
+            sheetId=number,
+            title=SHEET_TITLE.format(number + 1),
+            gridProperties=dict(
+                rowCount=rows,
+                columnCount=columns,
+            )
+        )))
+    return spreadsheet_body
+
+
+def get_sheet_chunks(
+    sheet: List[List[str]],
+    batch_rows: int,
+    batch_bytes: int,
+) -> List[Tuple[int, List[List[str]], int]]:
+    """
+    Делит лист на части до batch_rows строк и batch_bytes байт значений
+    в JSON: (номер первой строки, строки, размер в байтах).
+    """
+    chunks = []
+    for number, row in enumerate(sheet, 1):
+        length = len(json.dumps(row)) + 1
+        if (
+            not chunks or
+            len(chunks[-1][1]) >= batch_rows or
+            chunks[-1][2] + length > batch_bytes
+        ):
+            chunks.append((number, [], 0))
+        first, rows, size = chunks[-1]
+        rows.append(row)
+        chunks[-1] = (first, rows, size + length)
+    return chunks
+
+
+def get_batch_update_bodies(
+    sheets: List[List[List[str]]],
+    batch_rows: int = BATCH_UPDATE_ROWS,
+    batch_bytes: int = BATCH_UPDATE_BYTES,
+) -> List[Dict]:
+    """
+    Группирует листы в запросы values.batchUpdate до batch_rows строк
+    и batch_bytes байт значений. Лист, не помещающийся в один запрос,
+    отправляется диапазонами строк.
+    """
+    bodies = []
+    batch_size = batch_length = 0
+    for number, sheet in enumerate(sheets):
+        _, columns = get_sheet_size(sheet)
+        for first, rows, length in get_sheet_chunks(
+            sheet, batch_rows, batch_bytes
+        ):
+            if (
+                not bodies or
+                batch_size + len(rows) > batch_rows or
+                batch_length + length > batch_bytes
+            ):
+                bodies.append(dict(valueInputOption='USER_ENTERED', data=[]))
+                batch_size = batch_length = 0
+            last = first + len(rows) - 1
+            bodies[-1]['data'].append(dict(
+                range=(
+                    f"'{SHEET_TITLE.format(number + 1)}'"
+                    f'!R{first}C1:R{last}C{columns}'
+                ),
+                majorDimension='ROWS',
+                values=rows,
+            ))
+            batch_size += len(rows)
+            batch_length += length
+    return bodies
+
+
 async def spreadsheets_create(
-    wrapper_services: Aiogoogle,
+    wrapper_services: GoogleClientManager,
     now_date_time: datetime,
     spreadsheet_body: Dict = None,
 ) -> str:
@@ -59,7 +165,7 @@ async def spreadsheets_create(
 
 async def set_user_permissions(
         spreadsheet_id: str,
-        wrapper_services: Aiogoogle
+        wrapper_services: GoogleClientManager
 ) -> None:
     permissions_body = {
         'type': 'user',
@@ -77,41 +183,17 @@ async def set_user_permissions(
 
 async def spreadsheets_update_value(
         spreadsheet_id: str,
-        projects: list,
-        wrapper_services: Aiogoogle,
-        now_date_time: datetime,
+        sheets: List[List[List[str]]],
+        wrapper_services: GoogleClientManager,
+        on_batch: Optional[Callable[[], None]] = None,
 ) -> None:
     service = await wrapper_services.discover('sheets', 'v4')
-    projects_fields = sorted((
-        (
-            project.name,
-            project.close_date - project.create_date,
-            project.description
-        ) for project in projects
-    ), key=lambda x: x[1])
-    header = copy.deepcopy(HEADER)
-    header[0][1] = str(now_date_time)
-    table_values = [
-        *header,
-        *[list(map(str, field)) for field in projects_fields],
-    ]
-    my_row, my_column = len(table_values), max(len(table) for table in header)
-    if my_row > ROW or my_column > COLUMN:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail=SPREADSHEET_SIZE_ERROR.format(
-                my_row=my_row, my_column=my_column,
-                row=ROW, column=COLUMN
-            ),
+    for body in get_batch_update_bodies(sheets):
+        await wrapper_services.as_service_account(
+            service.spreadsheets.values.batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                json=body,
+            )
         )
-    await wrapper_services.as_service_account(
-        service.spreadsheets.values.update(
-            spreadsheetId=spreadsheet_id,
-            range=f'R1C1:R{ROW}C{COLUMN}',
-            valueInputOption='USER_ENTERED',
-            json={
-                'majorDimension': 'ROWS',
-                'values': table_values
-            }
-        )
-    )
+        if on_batch is not None:
+            on_batch()
@@ -1,10 +1,20 @@
 from datetime import datetime
-from typing import Union
+from typing import List, Union
 
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models import CharityProject, Donation
 from app.crud.base import CRUDBase
+from app.services.funding_events import funding_broker, note_funding
+from app.services.open_pool import open_pool
+from app.services.statistics import add_deltas
+
+
+LOOP_ENGINE = 'loop'
+SQL_ENGINE = 'sql'
+POOL_ENGINE = 'pool'
 
 
 async def set_fully_invested(
@@ -14,27 +24,240 @@ async def set_fully_invested(
     object.close_date = datetime.now()
 
 
-async def project_invest(
+def get_source_model(target: Union[Donation, CharityProject]):
+    return CharityProject if isinstance(target, Donation) else Donation
+
+
+async def invest_source(
+    target: Union[Donation, CharityProject],
+    source: Union[Donation, CharityProject],
+) -> None:
+    amount = min(
+        source.full_amount - source.invested_amount,
+        target.full_amount - target.invested_amount
+    )
+    for item in (target, source):
+        item.invested_amount += amount
+        if item.full_amount == item.invested_amount:
+            await set_fully_invested(item)
+
+
+async def loop_invest(
     target: Union[Donation, CharityProject],
     session: AsyncSession
 ):
-    sources = await CRUDBase.get_not_invested(
-        CharityProject if isinstance(target, Donation) else Donation,
+    sources = await CRUDBase.stream_not_invested(
+        get_source_model(target),
         session
     )
-    if not sources:
-        return None
     result = []
-    for source in sources:
-        result.append(source)
-        amount = min(
-            source.full_amount - source.invested_amount,
-            target.full_amount - target.invested_amount
+    try:
+        async for source in sources:
+            result.append(source)
+            await invest_source(target, source)
+            if target.fully_invested:
+                break
+    finally:
+        await sources.close()
+    return result or None
+
+
+async def get_funded_ids(
+    model,
+    queue,
+    available: int,
+    boundary,
+    session: AsyncSession
+) -> List[int]:
+    """Проекты, которые получат средства, если на события есть подписчики."""
+    if model is not CharityProject or not funding_broker.subscribers:
+        return []
+    funded = (await session.execute(
+        select(queue.c.id).where(queue.c.cumulative <= available)
+    )).scalars().all()
+    if boundary is not None:
+        funded.append(boundary.id)
+    return funded
+
+
+async def note_projects_funding(
+    project_ids: List[int],
+    session: AsyncSession
+) -> None:
+    if not project_ids:
+        return
+    projects = await session.execute(
+        select(
+            CharityProject.id,
+            CharityProject.invested_amount,
+            CharityProject.fully_invested,
+        ).where(CharityProject.id.in_(project_ids))
+    )
+    for project in projects:
+        note_funding(session, *project)
+
+
+async def sql_invest(
+    target: Union[Donation, CharityProject],
+    session: AsyncSession
+):
+    """
+    Распределяет средства на стороне БД.
+
+    Нарастающий итог остатков открытых объектов (в порядке create_date)
+    определяет покрытый префикс: он закрывается одним UPDATE, граничный
+    объект пополняется вторым. Число запросов не зависит от количества
+    закрываемых объектов. Изменённые источники не загружаются в сессию,
+    поэтому возвращается только сам target, а изменения счётчиков
+    статистики и события финансирования проектов добавляются явно.
+    """
+    model = get_source_model(target)
+    available = target.full_amount - target.invested_amount
+    if available <= 0:
+        return None
+    remaining = model.full_amount - model.invested_amount
+    queue = select(
+        model.id,
+        remaining.label('remaining'),
+        func.sum(remaining).over(
+            order_by=(model.create_date, model.id)
+        ).label('cumulative'),
+    ).where(~model.fully_invested).subquery()
+    boundary = (await session.execute(
+        select(
+            queue.c.id,
+            (queue.c.cumulative - queue.c.remaining).label('before'),
+        ).where(
+            queue.c.cumulative > available
+        ).order_by(queue.c.cumulative, queue.c.id).limit(1)
+    )).first()
+    if boundary is None:
+        amount = (await session.execute(
+            select(func.coalesce(func.sum(queue.c.remaining), 0))
+        )).scalar()
+    else:
+        amount = available
+    if not amount:
+        return None
+    funded = await get_funded_ids(model, queue, available, boundary, session)
+    closed = await session.execute(
+        update(model).where(
+            model.id.in_(
+                select(queue.c.id).where(queue.c.cumulative <= available)
+            )
+        ).values(
+            invested_amount=model.full_amount,
+            fully_invested=True,
+            close_date=datetime.now(),
+        ).execution_options(synchronize_session=False)
+    )
+    if boundary is not None and boundary.before < available:
+        await session.execute(
+            update(model).where(
+                model.id == boundary.id
+            ).values(
+                invested_amount=(
+                    model.invested_amount + available - boundary.before
+                ),
+            ).execution_options(synchronize_session=False)
         )
-        for item in (target, source):
-            item.invested_amount += amount
-            if item.full_amount == item.invested_amount:
-                await set_fully_invested(item)
-        if target.fully_invested:
+    if model is Donation:
+        add_deltas(session, invested_amount=amount)
+    else:
+        add_deltas(session, open_projects=-closed.rowcount)
+    await note_projects_funding(funded, session)
+    target.invested_amount += amount
+    if target.full_amount == target.invested_amount:
+        await set_fully_invested(target)
+    return [target]
+
+
+async def pool_invest(
+    target: Union[Donation, CharityProject],
+    session: AsyncSession
+):
+    """
+    Распределяет средства по индексу открытых объектов open_pool.
+
+    Из БД загружаются только объекты, которые получат средства. Если они
+    разошлись с индексом, очередь перечитывается и попытка повторяется;
+    при повторном расхождении используется loop_invest.
+    """
+    model = get_source_model(target)
+    for _ in range(2):
+        if not await open_pool.check_version(model, session):
+            await open_pool.sync(model, session)
+        planned = open_pool.plan(
+            model, target.full_amount - target.invested_amount
+        )
+        if not planned:
+            open_pool.note(target, session)
+            return None
+        sources = await session.execute(
+            select(model).where(
+                model.id.in_([item.id for item in planned])
+            )
+        )
+        sources = {source.id: source for source in sources.scalars()}
+        if open_pool.matches(planned, sources):
             break
+        open_pool.invalidate(model)
+    else:
+        return await loop_invest(target, session)
+    result = []
+    for item in planned:
+        source = sources[item.id]
+        result.append(source)
+        await invest_source(target, source)
+        open_pool.note(source, session)
+    open_pool.note(target, session)
+    return result
+
+
+ENGINES = {
+    LOOP_ENGINE: loop_invest,
+    SQL_ENGINE: sql_invest,
+    POOL_ENGINE: pool_invest,
+}
+
+
+async def project_invest(
+    target: Union[Donation, CharityProject],
+    session: AsyncSession
+):
+    return await ENGINES[settings.investment_engine](target, session)
+
+
+async def batch_invest(
+    targets: List[Union[Donation, CharityProject]],
+    session: AsyncSession
+):
+    """
+    Распределяет средства для нескольких объектов одной модели за один проход.
+
+    Открытые источники читаются одним потоком и расходуются по порядку;
+    чтение прекращается, как только все объекты получили средства.
+    """
+    if not targets:
+        return None
+    sources = await CRUDBase.stream_not_invested(
+        get_source_model(targets[0]),
+        session
+    )
+    pending = iter(targets)
+    target = next(pending)
+    result = []
+    try:
+        async for source in sources:
+            result.append(source)
+            while target is not None and not source.fully_invested:
+                await invest_source(target, source)
+                if target.fully_invested:
+                    target = next(pending, None)
+            if target is None:
+                break
+    finally:
+        await sources.close()
+    for item in (*result, *targets):
+        open_pool.note(item, session)
     return result
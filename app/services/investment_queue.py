@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from itertools import groupby
+from typing import List, Sequence, Tuple, Union
+
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.init_db import get_async_session_context
+from app.models import CharityProject, Donation
+from app.services.investment import batch_invest, get_source_model
+
+
+QUEUE_MODE = 'queue'
+PENDING_STATUS = 'pending'
+MAX_BATCH_SIZE = 1000
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 1
+
+logger = logging.getLogger(__name__)
+
+
+class InvestmentQueue:
+    """
+    Очередь отложенного распределения средств.
+
+    Эндпоинты только сохраняют объект и ставят его в очередь. Фоновый
+    обработчик забирает все накопившиеся задачи (не больше max_batch_size),
+    распределяет их одним проходом на каждую модель и фиксирует
+    одной транзакцией. Неудачная пачка после паузы возвращается в очередь,
+    пока не исчерпает max_attempts попыток.
+
+    Очередь хранится в памяти процесса, поэтому при запуске обработчик
+    сначала распределяет открытые пожертвования, оставшиеся от прошлого
+    запуска или сбоя.
+    """
+
+    def __init__(
+        self,
+        session_factory=get_async_session_context,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_attempts: int = MAX_ATTEMPTS,
+        retry_delay: float = RETRY_DELAY,
+    ):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.queue = None
+        self.worker = None
+        self.reconciled = None
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self.reconciled = asyncio.Event()
+        self.worker = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        self.worker = None
+
+    async def join(self) -> None:
+        if self.queue is not None:
+            await self.reconciled.wait()
+            await self.queue.join()
+
+    def put(self, obj: Union[Donation, CharityProject]) -> str:
+        if self.worker is None:
+            self.start()
+        self.queue.put_nowait((type(obj), obj.id, 1))
+        return PENDING_STATUS
+
+    async def run(self) -> None:
+        try:
+            await self.reconcile()
+        except Exception:
+            logger.exception('Не удалось распределить открытые пожертвования')
+        finally:
+            self.reconciled.set()
+        while True:
+            jobs = [await self.queue.get()]
+            while len(jobs) < self.max_batch_size and not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+            try:
+                await self.process(jobs)
+            except Exception:
+                logger.exception('Не удалось распределить %s объектов', len(jobs))
+                await self.retry(jobs)
+            finally:
+                for _ in jobs:
+                    self.queue.task_done()
+
+    async def retry(self, jobs: List[Tuple]) -> None:
+        await asyncio.sleep(self.retry_delay)
+        for model, obj_id, attempt in jobs:
+            if attempt < self.max_attempts:
+                self.queue.put_nowait((model, obj_id, attempt + 1))
+            else:
+                logger.error(
+                    'Объект %s %s не распределён после %s попыток',
+                    model.__name__, obj_id, attempt
+                )
+
+    async def process(self, jobs: List[Tuple]) -> None:
+        async with self.session_factory() as session:
+            for model, group in groupby(jobs, key=lambda job: job[0]):
+                targets = await session.execute(
+                    select(model).where(
+                        model.id.in_([job[1] for job in group]),
+                        ~model.fully_invested,
+                    ).order_by(model.create_date, model.id)
+                )
+                await batch_invest(targets.scalars().all(), session)
+            await session.commit()
+
+    async def reconcile(self) -> None:
+        """
+        Распределяет открытые пожертвования пачками по max_batch_size,
+        пока не кончатся они или открытые проекты.
+        """
+        while True:
+            async with self.session_factory() as session:
+                donations = await session.execute(
+                    select(Donation).where(
+                        ~Donation.fully_invested
+                    ).order_by(
+                        Donation.create_date, Donation.id
+                    ).limit(self.max_batch_size)
+                )
+                donations = donations.scalars().all()
+                await batch_invest(donations, session)
+                await session.commit()
+            if (
+                len(donations) < self.max_batch_size or
+                not donations[-1].fully_invested
+            ):
+                return
+
+
+investment_queue = InvestmentQueue()
+
+
+async def set_investment_status(
+    objs: Sequence[Union[Donation, CharityProject]],
+    session: AsyncSession,
+) -> None:
+    """
+    Отмечает PENDING_STATUS открытые объекты, для которых есть открытые
+    источники средств: их распределение ещё не выполнено.
+    """
+    open_objs = [obj for obj in objs if not obj.fully_invested]
+    if not open_objs:
+        return
+    model = get_source_model(open_objs[0])
+    has_sources = await session.execute(
+        select(exists().where(~model.fully_invested))
+    )
+    if has_sources.scalar():
+        for obj in open_objs:
+            obj.investment_status = PENDING_STATUS
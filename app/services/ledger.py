@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.init_db import get_async_session_context
+from app.models import CharityProject, Donation
+from app.services.statistics import check_statistics
+
+
+READ_CHUNK_SIZE = 100000
+WRITE_CHUNK_SIZE = 10000
+REPORT_LIMIT = 20
+
+LEDGER_REPORT = '{model}: проверено {total}, расхождений {mismatched}.'
+LEDGER_ROW = (
+    '  id={id}: invested_amount {invested_amount} -> {expected_amount}, '
+    'fully_invested {fully_invested} -> {expected_fully}, '
+    'close_date {close_date} -> {expected_close}'
+)
+LEDGER_FIXED = 'Исправления записаны.'
+
+
+class Ledger(NamedTuple):
+    id: np.ndarray
+    full_amount: np.ndarray
+    invested_amount: np.ndarray
+    fully_invested: np.ndarray
+    create_date: np.ndarray
+    close_date: np.ndarray
+
+
+def to_ledger(rows: list) -> Ledger:
+    ids, full, invested, fully, create, close = zip(*rows) if rows else (
+        (), (), (), (), (), ()
+    )
+    return Ledger(
+        id=np.array(ids, dtype=np.int64),
+        full_amount=np.array(full, dtype=np.int64),
+        invested_amount=np.array(invested, dtype=np.int64),
+        fully_invested=np.array(fully, dtype=bool),
+        create_date=np.array(create, dtype='datetime64[us]'),
+        close_date=np.array(close, dtype='datetime64[us]'),
+    )
+
+
+async def read_ledger(
+    model,
+    session: AsyncSession,
+    chunk_size: int = READ_CHUNK_SIZE,
+) -> Ledger:
+    """Читает таблицу в порядке create_date, id порциями в массивы."""
+    result = await session.stream(
+        select(
+            model.id,
+            model.full_amount,
+            func.coalesce(model.invested_amount, 0),
+            func.coalesce(model.fully_invested, False),
+            model.create_date,
+            model.close_date,
+        ).order_by(
+            model.create_date, model.id
+        ).execution_options(yield_per=chunk_size)
+    )
+    chunks = [to_ledger(rows) async for rows in result.partitions(chunk_size)]
+    if not chunks:
+        return to_ledger([])
+    return Ledger(*(np.concatenate(column) for column in zip(*chunks)))
+
+
+def replay_side(ledger: Ledger, other: Ledger) -> Ledger:
+    """
+    Ожидаемое состояние одной стороны при распределении по FIFO.
+
+    Объект получает ту часть общей суммы другой стороны, которая
+    приходится на его отрезок нарастающего итога. Закрывается он в момент
+    появления объекта другой стороны, нарастающий итог которого
+    первым покрыл его отрезок.
+    """
+    ends = np.cumsum(ledger.full_amount)
+    other_ends = np.cumsum(other.full_amount)
+    total = other_ends[-1] if other_ends.size else 0
+    invested = np.clip(
+        total - (ends - ledger.full_amount), 0, ledger.full_amount
+    )
+    fully = invested == ledger.full_amount
+    closer = np.searchsorted(other_ends, ends, side='left')
+    closer_date = (
+        other.create_date[np.minimum(closer, other_ends.size - 1)]
+        if other_ends.size else np.full(ends.size, np.datetime64('NaT'))
+    )
+    close = np.where(
+        ledger.fully_invested & ~np.isnat(ledger.close_date),
+        ledger.close_date,
+        np.maximum(ledger.create_date, closer_date),
+    )
+    return ledger._replace(
+        invested_amount=invested,
+        fully_invested=fully,
+        close_date=np.where(fully, close, np.datetime64('NaT')),
+    )
+
+
+def replay(projects: Ledger, donations: Ledger) -> Tuple[Ledger, Ledger]:
+    return (
+        replay_side(projects, donations),
+        replay_side(donations, projects),
+    )
+
+
+def find_mismatches(actual: Ledger, expected: Ledger) -> np.ndarray:
+    return np.flatnonzero(
+        (actual.invested_amount != expected.invested_amount) |
+        (actual.fully_invested != expected.fully_invested) |
+        (np.isnat(actual.close_date) != np.isnat(expected.close_date))
+    )
+
+
+async def write_corrections(
+    model,
+    expected: Ledger,
+    mismatches: np.ndarray,
+    session: AsyncSession,
+    chunk_size: int = WRITE_CHUNK_SIZE,
+) -> None:
+    table = model.__table__
+    statement = update(table).where(
+        table.c.id == bindparam('ledger_id')
+    ).values(
+        invested_amount=bindparam('ledger_invested_amount'),
+        fully_invested=bindparam('ledger_fully_invested'),
+        close_date=bindparam('ledger_close_date'),
+    )
+    for start in range(0, mismatches.size, chunk_size):
+        rows = mismatches[start:start + chunk_size]
+        await session.execute(statement, [
+            dict(
+                ledger_id=int(expected.id[row]),
+                ledger_invested_amount=int(expected.invested_amount[row]),
+                ledger_fully_invested=bool(expected.fully_invested[row]),
+                ledger_close_date=expected.close_date[row].item(),
+            ) for row in rows
+        ])
+
+
+async def check_ledger(
+    session: AsyncSession,
+    fix: bool = False,
+    chunk_size: int = READ_CHUNK_SIZE,
+) -> Dict:
+    """
+    Пересчитывает распределение и сравнивает его с сохранённым.
+
+    Возвращает для каждой модели фактическое и ожидаемое состояние
+    и индексы расходящихся строк; при fix=True записывает исправления.
+    """
+    projects = await read_ledger(CharityProject, session, chunk_size)
+    donations = await read_ledger(Donation, session, chunk_size)
+    expected_projects, expected_donations = replay(projects, donations)
+    report = {}
+    for model, actual, expected in (
+        (CharityProject, projects, expected_projects),
+        (Donation, donations, expected_donations),
+    ):
+        mismatches = find_mismatches(actual, expected)
+        report[model] = (actual, expected, mismatches)
+        if fix and mismatches.size:
+            await write_corrections(model, expected, mismatches, session)
+    if fix:
+        await session.commit()
+        await check_statistics(session, fix=True)
+    return report
+
+
+def print_report(report: Dict, limit: int = REPORT_LIMIT) -> None:
+    for model, (actual, expected, mismatches) in report.items():
+        print(LEDGER_REPORT.format(
+            model=model.__name__,
+            total=actual.id.size,
+            mismatched=mismatches.size,
+        ))
+        for row in mismatches[:limit]:
+            print(LEDGER_ROW.format(
+                id=actual.id[row],
+                invested_amount=actual.invested_amount[row],
+                expected_amount=expected.invested_amount[row],
+                fully_invested=actual.fully_invested[row],
+                expected_fully=expected.fully_invested[row],
+                close_date=actual.close_date[row],
+                expected_close=expected.close_date[row],
+            ))
+
+
+async def main(fix: bool, chunk_size: int) -> None:
+    async with get_async_session_context() as session:
+        report = await check_ledger(session, fix, chunk_size)
+    print_report(report)
+    if fix:
+        print(LEDGER_FIXED)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Сверка invested_amount/fully_invested/close_date '
+                    'с распределением пожертвований по FIFO.'
+    )
+    parser.add_argument(
+        '--fix', action='store_true', help='записать исправления в БД'
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=READ_CHUNK_SIZE,
+        help='размер порции при чтении из БД'
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.fix, args.chunk_size))
@@ -0,0 +1,184 @@
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Union
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import CharityProject, Donation
+
+
+OPEN_POOL_CHANGES = 'open_pool_changes'
+OPEN_POOL_MODELS = 'open_pool_models'
+
+
+class OpenItem:
+    __slots__ = ('id', 'remaining', 'create_date')
+
+    def __init__(self, id: int, remaining: int, create_date: datetime):
+        self.id = id
+        self.remaining = remaining
+        self.create_date = create_date
+
+    def __repr__(self) -> str:
+        return f'id={self.id} - remaining={self.remaining}'
+
+
+class OpenPool:
+    """
+    Процессный индекс открытых проектов и пожертвований.
+
+    Для каждой модели хранит очередь записей id/остаток/create_date
+    в порядке FIFO и максимальный известный id. Если в таблице появился
+    неизвестный индексу id или данные строки разошлись с записью,
+    очередь модели перечитывается из БД.
+
+    Изменения объектов копятся в session.info и попадают в индекс только
+    после commit; если транзакция завершилась без commit, очереди
+    затронутых моделей сбрасываются.
+    """
+
+    def __init__(self, *models):
+        self.queues = {model: deque() for model in models}
+        self.index = {model: {} for model in models}
+        self.max_ids = {model: None for model in models}
+
+    def clear(self) -> None:
+        for model in self.queues:
+            self.invalidate(model)
+
+    def invalidate(self, model) -> None:
+        self.queues[model] = deque()
+        self.index[model] = {}
+        self.max_ids[model] = None
+
+    async def sync(self, model, session: AsyncSession) -> None:
+        rows = await session.execute(
+            select(
+                model.id,
+                model.full_amount - model.invested_amount,
+                model.create_date,
+            ).where(
+                ~model.fully_invested
+            ).order_by(model.create_date, model.id)
+        )
+        items = [OpenItem(*row) for row in rows]
+        self.queues[model] = deque(items)
+        self.index[model] = {item.id: item for item in items}
+        self.max_ids[model] = await self.get_max_id(model, session)
+        session.info.setdefault(OPEN_POOL_MODELS, set()).add(model)
+
+    async def warm_up(self, session: AsyncSession) -> None:
+        for model in self.queues:
+            await self.sync(model, session)
+
+    @staticmethod
+    async def get_max_id(model, session: AsyncSession) -> int:
+        max_id = await session.execute(select(func.max(model.id)))
+        return max_id.scalar() or 0
+
+    async def check_version(self, model, session: AsyncSession) -> bool:
+        if self.max_ids[model] is None:
+            return False
+        return await self.get_max_id(model, session) == self.max_ids[model]
+
+    def plan(self, model, amount: int) -> List[OpenItem]:
+        queue = self.queues[model]
+        while queue and queue[0].remaining <= 0:
+            queue.popleft()
+        planned = []
+        for item in queue:
+            if amount <= 0:
+                break
+            if item.remaining <= 0:
+                continue
+            planned.append(item)
+            amount -= item.remaining
+        return planned
+
+    @staticmethod
+    def matches(
+        planned: List[OpenItem],
+        sources: Dict[int, Union[Donation, CharityProject]],
+    ) -> bool:
+        for item in planned:
+            source = sources.get(item.id)
+            if (
+                source is None or source.fully_invested or
+                source.full_amount - source.invested_amount != item.remaining
+            ):
+                return False
+        return True
+
+    def note(
+        self,
+        obj: Union[Donation, CharityProject],
+        session: AsyncSession,
+    ) -> None:
+        """Запоминает состояние объекта, которое попадёт в индекс при commit."""
+        session.info.setdefault(OPEN_POOL_CHANGES, {})[type(obj), obj.id] = (
+            obj.fully_invested,
+            obj.full_amount - obj.invested_amount,
+            obj.create_date,
+        )
+
+    def apply(
+        self,
+        model,
+        obj_id: int,
+        fully_invested: bool,
+        remaining: int,
+        create_date: datetime,
+    ) -> None:
+        max_id = self.max_ids[model]
+        if max_id is None:
+            return
+        item = self.index[model].get(obj_id)
+        if item is None and (
+            obj_id > max_id + 1 or
+            obj_id <= max_id and not fully_invested
+        ):
+            self.invalidate(model)
+            return
+        self.max_ids[model] = max(max_id, obj_id)
+        if fully_invested:
+            if item is not None:
+                item.remaining = 0
+                del self.index[model][obj_id]
+            return
+        if item is None:
+            item = OpenItem(obj_id, remaining, create_date)
+            self.queues[model].append(item)
+            self.index[model][obj_id] = item
+        else:
+            item.remaining = remaining
+
+
+open_pool = OpenPool(CharityProject, Donation)
+
+
+@event.listens_for(Session, 'after_commit')
+def apply_open_pool_changes(session):
+    session.info.pop(OPEN_POOL_MODELS, None)
+    changes = session.info.pop(OPEN_POOL_CHANGES, {})
+    for (model, obj_id), state in changes.items():
+        open_pool.apply(model, obj_id, *state)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def reset_open_pool_changes(session, transaction):
+    """
+    Сбрасывает очереди моделей, изменённых в транзакции без commit.
+
+    Очередь, перечитанная в такой транзакции, могла увидеть её
+    незафиксированные изменения, поэтому она тоже сбрасывается.
+    """
+    if transaction.parent is not None:
+        return
+    models = session.info.pop(OPEN_POOL_MODELS, set())
+    changes = session.info.pop(OPEN_POOL_CHANGES, None)
+    if not changes:
+        return
+    for model in models | {model for model, _ in changes}:
+        open_pool.invalidate(model)
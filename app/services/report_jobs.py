@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from app.core.google_client import get_service
+from app.services.google_api import (
+    get_batch_update_bodies, get_spreadsheet_body, set_user_permissions,
+    spreadsheets_create, spreadsheets_update_value
+)
+
+
+PENDING_STATUS = 'pending'
+RUNNING_STATUS = 'running'
+DONE_STATUS = 'done'
+FAILED_STATUS = 'failed'
+MAX_FINISHED_JOBS = 100
+SPREADSHEET_URL = 'https://docs.google.com/spreadsheets/d/{}'
+REPORT_FAILED_ERROR = 'Не удалось сформировать отчёт.'
+
+logger = logging.getLogger(__name__)
+
+
+def get_report_key(sheets: List[List[List[str]]]) -> str:
+    """Отпечаток данных отчёта без строки с датой формирования."""
+    rows = [sheet[1:] for sheet in sheets]
+    return hashlib.blake2b(
+        json.dumps(rows, ensure_ascii=False).encode(), digest_size=16
+    ).hexdigest()
+
+
+class ReportJob:
+
+    def __init__(self, key: str, sheets: List, now_date_time: str):
+        self.id = uuid4().hex
+        self.key = key
+        self.sheets = sheets
+        self.spreadsheet_body = get_spreadsheet_body(sheets)
+        self.now_date_time = now_date_time
+        self.status = PENDING_STATUS
+        self.steps_done = 0
+        self.steps_total = 2 + len(get_batch_update_bodies(sheets))
+        self.spreadsheet_id = None
+        self.error = None
+
+    def step(self) -> None:
+        self.steps_done += 1
+
+    def as_dict(self) -> Dict:
+        return dict(
+            id=self.id,
+            status=self.status,
+            progress=round(100 * self.steps_done / self.steps_total),
+            spreadsheet_url=(
+                SPREADSHEET_URL.format(self.spreadsheet_id)
+                if self.spreadsheet_id else None
+            ),
+            error=self.error,
+        )
+
+
+class ReportJobs:
+    """
+    Фоновое формирование отчётов в Google Sheets.
+
+    Задача с теми же данными отчёта, что уже формируется или сформирована,
+    не запускается заново: запрос получает существующую задачу. Неудачная
+    задача заменяется новой. Хранятся последние max_finished_jobs
+    завершённых задач.
+    """
+
+    def __init__(
+        self,
+        services_context=asynccontextmanager(get_service),
+        max_finished_jobs: int = MAX_FINISHED_JOBS,
+    ):
+        self.services_context = services_context
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = OrderedDict()
+        self.by_key = {}
+        self.tasks = set()
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        return self.jobs.get(job_id)
+
+    def submit(self, sheets: List, now_date_time: str) -> ReportJob:
+        key = get_report_key(sheets)
+        job = self.by_key.get(key)
+        if job is not None and job.status != FAILED_STATUS:
+            return job
+        job = ReportJob(key, sheets, now_date_time)
+        self.jobs[job.id] = job
+        self.by_key[key] = job
+        task = asyncio.create_task(self.run(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return job
+
+    async def run(self, job: ReportJob) -> None:
+        job.status = RUNNING_STATUS
+        try:
+            async with self.services_context() as services:
+                job.spreadsheet_id = await spreadsheets_create(
+                    services, job.now_date_time, job.spreadsheet_body
+                )
+                job.step()
+                await set_user_permissions(job.spreadsheet_id, services)
+                job.step()
+                await spreadsheets_update_value(
+                    job.spreadsheet_id, job.sheets, services, job.step
+                )
+        except Exception:
+            logger.exception('Не удалось сформировать отчёт %s', job.id)
+            job.status = FAILED_STATUS
+            job.error = REPORT_FAILED_ERROR
+        else:
+            job.status = DONE_STATUS
+        finally:
+            job.sheets = job.spreadsheet_body = None
+            self.evict()
+
+    def evict(self) -> None:
+        finished = [
+            job for job in self.jobs.values()
+            if job.status in (DONE_STATUS, FAILED_STATUS)
+        ]
+        for job in finished[:-self.max_finished_jobs or None]:
+            del self.jobs[job.id]
+            if self.by_key.get(job.key) is job:
+                del self.by_key[job.key]
+
+    async def stop(self) -> None:
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+report_jobs = ReportJobs()
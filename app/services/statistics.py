@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.init_db import get_async_session_context
+from app.models import CharityProject, Donation, FundStatistics
+
+
+STATISTICS_ID = 1
+STATISTICS_DELTAS = 'statistics_deltas'
+COUNTERS = (
+    'donations_count', 'donation_amount', 'invested_amount',
+    'projects_count', 'open_projects',
+)
+
+STATISTICS_REPORT = '{counter}: {stored} -> {expected}'
+STATISTICS_OK = 'Счётчики совпадают с данными.'
+STATISTICS_FIXED = 'Счётчики пересчитаны.'
+
+
+def add_deltas(session, **deltas) -> None:
+    """Добавляет изменения счётчиков, которые запишутся при commit."""
+    session.info.setdefault(STATISTICS_DELTAS, Counter()).update(deltas)
+
+
+def get_object_deltas(obj, sign: int) -> Dict:
+    if isinstance(obj, Donation):
+        return dict(
+            donations_count=sign,
+            donation_amount=sign * obj.full_amount,
+            invested_amount=sign * (obj.invested_amount or 0),
+        )
+    if isinstance(obj, CharityProject):
+        return dict(
+            projects_count=sign,
+            open_projects=sign * (not obj.fully_invested),
+        )
+    return {}
+
+
+def get_change(obj, field: str) -> Optional[Tuple]:
+    history = inspect(obj).attrs[field].history
+    if not history.added:
+        return None
+    return (history.deleted or [None])[0], history.added[0]
+
+
+def count_statistics(session: Session) -> Dict:
+    """Значения счётчиков, посчитанные по таблицам."""
+    values = session.execute(select(
+        select(func.count(Donation.id)).scalar_subquery(),
+        select(
+            func.coalesce(func.sum(Donation.full_amount), 0)
+        ).scalar_subquery(),
+        select(
+            func.coalesce(func.sum(Donation.invested_amount), 0)
+        ).scalar_subquery(),
+        select(func.count(CharityProject.id)).scalar_subquery(),
+        select(func.count(CharityProject.id)).where(
+            ~CharityProject.fully_invested
+        ).scalar_subquery(),
+    )).one()
+    return dict(zip(COUNTERS, values))
+
+
+@event.listens_for(Session, 'before_flush')
+def collect_deltas(session, flush_context, instances):
+    for objs, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objs:
+            add_deltas(session, **get_object_deltas(obj, sign))
+    for obj in session.dirty:
+        if isinstance(obj, Donation):
+            change = get_change(obj, 'invested_amount')
+            if change is not None:
+                old, new = change
+                add_deltas(session, invested_amount=(new or 0) - (old or 0))
+        elif isinstance(obj, CharityProject):
+            change = get_change(obj, 'fully_invested')
+            if change is not None:
+                old, new = change
+                add_deltas(session, open_projects=(not new) - (not old))
+
+
+@event.listens_for(Session, 'before_commit')
+def apply_deltas(session):
+    """
+    Записывает накопленные изменения счётчиков в той же транзакции.
+
+    Если строки счётчиков ещё нет, она создаётся пересчётом по таблицам.
+    """
+    session.flush()
+    deltas = {
+        counter: delta for counter, delta in
+        session.info.pop(STATISTICS_DELTAS, Counter()).items() if delta
+    }
+    if not deltas:
+        return
+    result = session.execute(
+        update(FundStatistics).where(
+            FundStatistics.id == STATISTICS_ID
+        ).values({
+            counter: getattr(FundStatistics, counter) + delta
+            for counter, delta in deltas.items()
+        }).execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        session.add(
+            FundStatistics(id=STATISTICS_ID, **count_statistics(session))
+        )
+        session.flush()
+
+
+@event.listens_for(Session, 'after_rollback')
+def reset_deltas(session):
+    session.info.pop(STATISTICS_DELTAS, None)
+
+
+async def get_statistics(session: AsyncSession) -> Dict:
+    statistics = await session.get(FundStatistics, STATISTICS_ID)
+    if statistics is None:
+        values = await session.run_sync(count_statistics)
+    else:
+        values = {counter: getattr(statistics, counter) for counter in COUNTERS}
+    values['donation_balance'] = (
+        values['donation_amount'] - values['invested_amount']
+    )
+    return values
+
+
+async def check_statistics(
+    session: AsyncSession,
+    fix: bool = False,
+) -> Tuple[Dict, Dict]:
+    """
+    Сравнивает сохранённые счётчики с посчитанными по таблицам.
+
+    При fix=True записывает посчитанные значения.
+    """
+    statistics = await session.get(FundStatistics, STATISTICS_ID)
+    stored = {
+        counter: getattr(statistics, counter, None) for counter in COUNTERS
+    }
+    expected = await session.run_sync(count_statistics)
+    if fix and stored != expected:
+        await session.merge(FundStatistics(id=STATISTICS_ID, **expected))
+        await session.commit()
+    return stored, expected
+
+
+async def main(fix: bool) -> None:
+    async with get_async_session_context() as session:
+        stored, expected = await check_statistics(session, fix)
+    if stored == expected:
+        print(STATISTICS_OK)
+        return
+    for counter in COUNTERS:
+        if stored[counter] != expected[counter]:
+            print(STATISTICS_REPORT.format(
+                counter=counter,
+                stored=stored[counter],
+                expected=expected[counter],
+            ))
+    if fix:
+        print(STATISTICS_FIXED)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Сверка счётчиков статистики фонда с данными.'
+    )
+    parser.add_argument(
+        '--fix', action='store_true', help='записать пересчитанные значения'
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.fix))
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.donation import donation_crud
+from app.schemas.donation import DonationCreate
+from app.services.investment import batch_invest
+from app.services.open_pool import open_pool
+from benchmarks.investment import invest_one, seed
+
+
+async def create_batch(session_factory, donations) -> None:
+    async with session_factory() as session:
+        created = await donation_crud.create_multi(donations, session)
+        await batch_invest(created, session)
+        await session.commit()
+
+
+async def run_mode(mode: str, projects, donations) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(directory) / "benchmark.db"}'
+        )
+        session_factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        await seed(engine, projects, [])
+        open_pool.clear()
+        statements = 0
+
+        def count(*args):
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', count)
+        try:
+            started = time.perf_counter()
+            if mode == 'batch':
+                await create_batch(session_factory, donations)
+            else:
+                for obj_in in donations:
+                    await invest_one(session_factory, obj_in)
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(engine.sync_engine, 'before_cursor_execute', count)
+            open_pool.clear()
+            await engine.dispose()
+    return dict(
+        seconds=round(elapsed, 4),
+        throughput=round(len(donations) / elapsed, 2),
+        statements=statements,
+    )
+
+
+async def run(donations: int, backlog: int, seed_value: int = 0) -> dict:
+    """Сравнивает пакетное создание пожертвований с одиночными запросами."""
+    rng = random.Random(seed_value)
+    projects = [rng.randint(10, 1000) for _ in range(backlog)]
+    items = [
+        DonationCreate(full_amount=rng.randint(1, 500))
+        for _ in range(donations)
+    ]
+    single = await run_mode('single', projects, items)
+    batch = await run_mode('batch', projects, items)
+    return dict(
+        donations=donations,
+        backlog=backlog,
+        single=single,
+        batch=batch,
+        speedup=round(batch['throughput'] / single['throughput'], 1),
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Пакетное создание пожертвований против одиночных.'
+    )
+    parser.add_argument('--donations', type=int, default=1000)
+    parser.add_argument('--backlog', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help='файл для JSON-отчёта')
+    args = parser.parse_args()
+    report = json.dumps(
+        asyncio.run(run(args.donations, args.backlog, args.seed)), indent=2
+    )
+    if args.output is not None:
+        args.output.write_text(report)
+    print(report)
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import re
+from collections import Counter
+from typing import Dict, List
+from uuid import uuid4
+
+from aiogoogle.excs import HTTPError
+from aiogoogle.models import Response
+
+from app.core.google_client import GoogleClientManager
+
+
+QUOTA_ERROR_STATUS = 429
+NOT_FOUND_STATUS = 404
+SPREADSHEETS_CREATE = 'sheets.spreadsheets.create'
+VALUES_BATCH_UPDATE = 'sheets.spreadsheets.values.batchUpdate'
+PERMISSIONS_CREATE = 'drive.permissions.create'
+
+
+def path_parameter(name: str) -> Dict:
+    return {name: dict(type='string', required=True, location='path')}
+
+
+DISCOVERY_DOCUMENTS = {
+    ('sheets', 'v4'): dict(
+        name='sheets',
+        version='v4',
+        rootUrl='https://sheets.googleapis.com/',
+        servicePath='',
+        batchPath='batch',
+        parameters={},
+        resources=dict(spreadsheets=dict(
+            methods=dict(create=dict(
+                id=SPREADSHEETS_CREATE,
+                path='v4/spreadsheets',
+                httpMethod='POST',
+                parameters={},
+                parameterOrder=[],
+            )),
+            resources=dict(values=dict(methods=dict(batchUpdate=dict(
+                id=VALUES_BATCH_UPDATE,
+                path='v4/spreadsheets/{spreadsheetId}/values:batchUpdate',
+                httpMethod='POST',
+                parameters=path_parameter('spreadsheetId'),
+                parameterOrder=['spreadsheetId'],
+            )))),
+        )),
+    ),
+    ('drive', 'v3'): dict(
+        name='drive',
+        version='v3',
+        rootUrl='https://www.googleapis.com/',
+        servicePath='drive/v3/',
+        batchPath='batch',
+        parameters=dict(fields=dict(type='string', location='query')),
+        resources=dict(permissions=dict(methods=dict(create=dict(
+            id=PERMISSIONS_CREATE,
+            path='files/{fileId}/permissions',
+            httpMethod='POST',
+            parameters=path_parameter('fileId'),
+            parameterOrder=['fileId'],
+        )))),
+    ),
+}
+
+ROUTES = (
+    (SPREADSHEETS_CREATE, re.compile(r'/v4/spreadsheets$')),
+    (
+        VALUES_BATCH_UPDATE,
+        re.compile(r'/v4/spreadsheets/(?P<id>[^/]+)/values:batchUpdate$'),
+    ),
+    (PERMISSIONS_CREATE, re.compile(r'/drive/v3/files/(?P<id>[^/?]+)/permissions')),
+)
+
+
+class FakeGoogleClientManager(GoogleClientManager):
+    """
+    Клиент Google API с подменой Sheets v4 и Drive v3 внутри процесса.
+
+    Запросы строятся настоящим aiogoogle по урезанным документам discovery,
+    а выполняются обработчиками в памяти: каждый ответ задерживается
+    на latency секунд, каждый quota_error_every-й вызов завершается
+    ошибкой 429, тела запросов сохраняются в payloads.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,
+        quota_error_every: int = 0,
+        record_payloads: bool = True,
+    ):
+        super().__init__(cache_dir=None)
+        self.latency = latency
+        self.quota_error_every = quota_error_every
+        self.record_payloads = record_payloads
+        self.calls = Counter()
+        self.downloads = Counter()
+        self.quota_errors = 0
+        self.payload_bytes = 0
+        self.payloads: List[Dict] = []
+        self.spreadsheets: Dict[str, Dict] = {}
+
+    async def download_document(self, api_name: str, api_version: str) -> Dict:
+        self.downloads[api_name, api_version] += 1
+        return json.loads(json.dumps(
+            DISCOVERY_DOCUMENTS[api_name, api_version]
+        ))
+
+    async def as_service_account(self, *requests, **kwargs):
+        responses = [await self.handle(request) for request in requests]
+        return responses[0] if len(responses) == 1 else responses
+
+    def route(self, request):
+        for name, pattern in ROUTES:
+            match = pattern.search(request.url)
+            if match is not None:
+                return name, match.groupdict().get('id')
+        self.fail(request, NOT_FOUND_STATUS)
+
+    def fail(self, request, status_code: int) -> None:
+        raise HTTPError(
+            f'{status_code} {request.url}',
+            req=request,
+            res=Response(status_code=status_code, url=request.url, req=request),
+        )
+
+    async def handle(self, request) -> Dict:
+        name, object_id = self.route(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls[name] += 1
+        if (
+            self.quota_error_every and
+            sum(self.calls.values()) % self.quota_error_every == 0
+        ):
+            self.quota_errors += 1
+            self.fail(request, QUOTA_ERROR_STATUS)
+        body = request.json or {}
+        self.payload_bytes += len(json.dumps(body, ensure_ascii=False).encode())
+        if self.record_payloads:
+            self.payloads.append(dict(method=name, id=object_id, json=body))
+        if name == SPREADSHEETS_CREATE:
+            return self.create_spreadsheet(body)
+        if object_id not in self.spreadsheets:
+            self.fail(request, NOT_FOUND_STATUS)
+        if name == VALUES_BATCH_UPDATE:
+            return self.update_values(object_id, body)
+        self.spreadsheets[object_id]['permissions'].append(body)
+        return dict(id=uuid4().hex)
+
+    def create_spreadsheet(self, body: Dict) -> Dict:
+        spreadsheet_id = uuid4().hex
+        self.spreadsheets[spreadsheet_id] = dict(
+            properties=body.get('properties', {}),
+            sheets=body.get('sheets', []),
+            permissions=[],
+            cells=0,
+        )
+        return dict(spreadsheetId=spreadsheet_id)
+
+    def update_values(self, spreadsheet_id: str, body: Dict) -> Dict:
+        cells = sum(
+            len(row) for item in body.get('data', ()) for row in item['values']
+        )
+        self.spreadsheets[spreadsheet_id]['cells'] += cells
+        return dict(
+            spreadsheetId=spreadsheet_id,
+            totalUpdatedCells=cells,
+            responses=[{} for _ in body.get('data', ())],
+        )
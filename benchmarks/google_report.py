@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from aiogoogle.excs import HTTPError
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.crud.charity_project import charity_project_crud
+from app.models import CharityProject
+from app.services.google_api import (
+    get_report_sheets, get_spreadsheet_body, set_user_permissions,
+    spreadsheets_create, spreadsheets_update_value
+)
+from benchmarks.fake_google import FakeGoogleClientManager
+from benchmarks.investment import START_DATE, percentile
+
+
+NOW_DATE_TIME = '2022/01/01 00:00:00'
+
+
+def closed_project_rows(rng: random.Random, count: int):
+    rows = []
+    for number in range(count):
+        create_date = START_DATE + timedelta(seconds=rng.randint(0, 10 ** 7))
+        rows.append(dict(
+            name=f'project {number}',
+            description='benchmark ' * rng.randint(1, 10),
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=create_date,
+            close_date=create_date + timedelta(
+                seconds=rng.randint(60, 10 ** 7)
+            ),
+        ))
+    return rows
+
+
+async def seed(engine, rows) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if rows:
+            await conn.execute(insert(CharityProject.__table__), rows)
+
+
+async def build_report(session_factory, services) -> None:
+    async with session_factory() as session:
+        projects = await charity_project_crud.get_projects_by_completion_rate(
+            session
+        )
+    sheets = get_report_sheets(projects, NOW_DATE_TIME)
+    spreadsheet_id = await spreadsheets_create(
+        services, NOW_DATE_TIME, get_spreadsheet_body(sheets)
+    )
+    await set_user_permissions(spreadsheet_id, services)
+    await spreadsheets_update_value(spreadsheet_id, sheets, services)
+
+
+async def run(
+    projects: int,
+    reports: int,
+    latency: float = 0,
+    quota_error_every: int = 0,
+    seed_value: int = 0,
+) -> dict:
+    """
+    Формирует reports отчётов по projects закрытым проектам
+    через подменный Google API.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(directory) / "benchmark.db"}'
+        )
+        session_factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        await seed(engine, closed_project_rows(
+            random.Random(seed_value), projects
+        ))
+        services = FakeGoogleClientManager(
+            latency=latency,
+            quota_error_every=quota_error_every,
+            record_payloads=False,
+        )
+        statements = 0
+
+        def count(*args):
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', count)
+        latencies = []
+        failures = Counter()
+        tracemalloc.start()
+        started = time.perf_counter()
+        for _ in range(reports):
+            report_started = time.perf_counter()
+            try:
+                await build_report(session_factory, services)
+            except HTTPError as error:
+                failures[error.res.status_code] += 1
+            latencies.append(time.perf_counter() - report_started)
+        elapsed = time.perf_counter() - started
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        event.remove(engine.sync_engine, 'before_cursor_execute', count)
+        await engine.dispose()
+    return dict(
+        projects=projects,
+        reports=reports,
+        latency=latency,
+        quota_error_every=quota_error_every,
+        seconds=round(elapsed, 4),
+        report_ms=dict(
+            p50=round(percentile(latencies, 0.5) * 1000, 3),
+            max=round(max(latencies) * 1000, 3),
+        ),
+        api_calls=dict(services.calls),
+        api_calls_per_report=round(sum(services.calls.values()) / reports, 2),
+        discovery_downloads=sum(services.downloads.values()),
+        failed_reports={str(status): count for status, count in failures.items()},
+        payload_kb=round(services.payload_bytes / 1024, 1),
+        statements=statements,
+        peak_memory_kb=round(peak_memory / 1024, 1),
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Время формирования отчёта Google Sheets на подменном API.'
+    )
+    parser.add_argument('--projects', type=int, default=20000)
+    parser.add_argument('--reports', type=int, default=5)
+    parser.add_argument(
+        '--latency', type=float, default=0,
+        help='задержка каждого вызова API в секундах'
+    )
+    parser.add_argument(
+        '--quota-error-every', type=int, default=0,
+        help='каждый N-й вызов API завершается ошибкой 429'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help='файл для JSON-отчёта')
+    args = parser.parse_args()
+    report = json.dumps(asyncio.run(run(
+        args.projects, args.reports, args.latency,
+        args.quota_error_every, args.seed
+    )), indent=2)
+    if args.output is not None:
+        args.output.write_text(report)
+    print(report)
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import Base
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.investment import ENGINES, project_invest
+from app.services.open_pool import open_pool
+
+
+START_DATE = datetime(2022, 1, 1)
+
+
+def tiny_donations(rng: random.Random, backlog: int, operations: int):
+    """Несколько крупных проектов, поток мелких пожертвований."""
+    projects = [rng.randint(10 ** 6, 10 ** 7) for _ in range(max(backlog // 100, 1))]
+    return projects, [], [
+        DonationCreate(full_amount=rng.randint(1, 100))
+        for _ in range(operations)
+    ]
+
+
+def huge_projects(rng: random.Random, backlog: int, operations: int):
+    """Длинная очередь мелких пожертвований, редкие крупные проекты."""
+    donations = [rng.randint(1, 100) for _ in range(backlog)]
+    share = sum(donations) // operations + 1
+    return [], donations, [
+        CharityProjectCreate(
+            name=f'project {number}',
+            description='benchmark',
+            full_amount=rng.randint(share // 2, share * 2),
+        ) for number in range(operations)
+    ]
+
+
+def long_backlog(rng: random.Random, backlog: int, operations: int):
+    """Длинная очередь небольших проектов, пожертвования закрывают по несколько."""
+    projects = [rng.randint(10, 1000) for _ in range(backlog)]
+    return projects, [], [
+        DonationCreate(full_amount=rng.randint(500, 5000))
+        for _ in range(operations)
+    ]
+
+
+WORKLOADS = {
+    'tiny_donations': tiny_donations,
+    'huge_projects': huge_projects,
+    'long_backlog': long_backlog,
+}
+
+
+def backlog_rows(amounts):
+    return [
+        dict(
+            full_amount=amount,
+            invested_amount=0,
+            fully_invested=False,
+            create_date=START_DATE + timedelta(seconds=number),
+        ) for number, amount in enumerate(amounts)
+    ]
+
+
+async def seed(engine, projects, donations) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if projects:
+            await conn.execute(insert(CharityProject.__table__), [
+                dict(row, name=f'backlog {number}', description='benchmark')
+                for number, row in enumerate(backlog_rows(projects))
+            ])
+        if donations:
+            await conn.execute(
+                insert(Donation.__table__), backlog_rows(donations)
+            )
+
+
+async def invest_one(session_factory, obj_in) -> None:
+    crud = (
+        donation_crud if isinstance(obj_in, DonationCreate)
+        else charity_project_crud
+    )
+    async with session_factory() as session:
+        target = await crud.create(obj_in, session, commit=False)
+        await project_invest(target, session)
+        await session.commit()
+
+
+def percentile(values, share: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+async def replay(
+    projects,
+    donations,
+    targets,
+    engine_name: str,
+    trace_memory: bool = False,
+) -> dict:
+    """
+    Прогоняет операции на свежей копии БД.
+
+    Память отслеживается только при trace_memory, чтобы tracemalloc
+    не искажал время замеряемого прохода.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(
+            f'sqlite+aiosqlite:///{Path(directory) / "benchmark.db"}'
+        )
+        session_factory = sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        await seed(engine, projects, donations)
+        default_engine = settings.investment_engine
+        statements = 0
+
+        def count(*args):
+            nonlocal statements
+            statements += 1
+
+        latencies = []
+        peak_memory = None
+        settings.investment_engine = engine_name
+        open_pool.clear()
+        event.listen(engine.sync_engine, 'before_cursor_execute', count)
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            for obj_in in targets:
+                operation_started = time.perf_counter()
+                await invest_one(session_factory, obj_in)
+                latencies.append(time.perf_counter() - operation_started)
+            elapsed = time.perf_counter() - started
+            if trace_memory:
+                _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            event.remove(engine.sync_engine, 'before_cursor_execute', count)
+            settings.investment_engine = default_engine
+            open_pool.clear()
+            await engine.dispose()
+    return dict(
+        elapsed=elapsed,
+        latencies=latencies,
+        statements=statements,
+        peak_memory=peak_memory,
+    )
+
+
+async def run(
+    workload: str,
+    engine_name: str,
+    backlog: int,
+    operations: int,
+    seed_value: int,
+) -> dict:
+    projects, donations, targets = WORKLOADS[workload](
+        random.Random(seed_value), backlog, operations
+    )
+    timed = await replay(projects, donations, targets, engine_name)
+    traced = await replay(
+        projects, donations, targets, engine_name, trace_memory=True
+    )
+    elapsed, latencies = timed['elapsed'], timed['latencies']
+    return dict(
+        workload=workload,
+        engine=engine_name,
+        backlog=backlog,
+        operations=operations,
+        seconds=round(elapsed, 4),
+        throughput=round(operations / elapsed, 2),
+        latency_ms=dict(
+            p50=round(percentile(latencies, 0.5) * 1000, 3),
+            p99=round(percentile(latencies, 0.99) * 1000, 3),
+            mean=round(statistics.mean(latencies) * 1000, 3),
+        ),
+        statements=timed['statements'],
+        statements_per_operation=round(timed['statements'] / operations, 2),
+        peak_memory_kb=round(traced['peak_memory'] / 1024, 1),
+    )
+
+
+async def main(args) -> list:
+    results = []
+    for workload in args.workload or WORKLOADS:
+        for engine_name in args.engine or ENGINES:
+            results.append(await run(
+                workload, engine_name, args.backlog,
+                args.operations, args.seed
+            ))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Нагрузочное сравнение движков распределения средств.'
+    )
+    parser.add_argument(
+        '--workload', action='append', choices=WORKLOADS,
+        help='профиль нагрузки (по умолчанию все)'
+    )
+    parser.add_argument(
+        '--engine', action='append', choices=ENGINES,
+        help='движок распределения (по умолчанию все)'
+    )
+    parser.add_argument('--backlog', type=int, default=5000)
+    parser.add_argument('--operations', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help='файл для JSON-отчёта')
+    args = parser.parse_args()
+    report = json.dumps(asyncio.run(main(args)), indent=2)
+    if args.output is not None:
+        args.output.write_text(report)
+    print(report)
@@ -23,6 +23,14 @@ except (NameError, ImportError):
         'Проверьте и поправьте: они должны быть доступны в модуле `app.core.db`.',
     )
 
+try:
+    from app.core.cache import object_cache, response_cache
+except (NameError, ImportError):
+    raise AssertionError(
+        'Не обнаружены объекты `object_cache, response_cache`. '
+        'Проверьте и поправьте: они должны быть доступны в модуле `app.core.cache`.',
+    )
+
 try:
     from app.core.user import current_superuser, current_user
 except (NameError, ImportError):
@@ -55,6 +63,7 @@ engine = create_async_engine(
 )
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
+    expire_on_commit=False,
 )
 
 
@@ -67,6 +76,8 @@ async def override_db():
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    response_cache.clear()
+    object_cache.clear()
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
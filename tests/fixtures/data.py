@@ -2,6 +2,9 @@ from datetime import datetime
 
 import pytest
 
+from app.core.config import settings
+from app.services.open_pool import open_pool
+
 
 @pytest.fixture
 def charity_project(freezer, mixer):
@@ -91,3 +94,11 @@ def another_donation(freezer, mixer):
         full_amount=2000,
         create_date=datetime.now(),
     )
+
+
+@pytest.fixture(params=['loop', 'sql', 'pool'])
+def investment_engine(request, monkeypatch):
+    open_pool.clear()
+    monkeypatch.setattr(settings, 'investment_engine', request.param)
+    yield request.param
+    open_pool.clear()
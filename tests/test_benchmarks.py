@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from aiogoogle.excs import HTTPError
+
+from app.services.google_api import (
+    get_report_sheets, get_spreadsheet_body, set_user_permissions,
+    spreadsheets_create, spreadsheets_update_value
+)
+from app.core.config import settings
+from benchmarks import donation_batch, google_report, investment
+from benchmarks.fake_google import (
+    PERMISSIONS_CREATE, SPREADSHEETS_CREATE, VALUES_BATCH_UPDATE,
+    FakeGoogleClientManager
+)
+from benchmarks.investment import ENGINES, WORKLOADS, run
+
+
+@pytest.mark.parametrize('workload', WORKLOADS)
+@pytest.mark.parametrize('engine', ENGINES)
+async def test_investment_benchmark_runs(workload, engine):
+    result = await run(workload, engine, backlog=20, operations=5, seed_value=0)
+    for key in ('throughput', 'latency_ms', 'statements', 'peak_memory_kb'):
+        assert key in result, f'В отчёте бенчмарка нет ключа `{key}`.'
+    assert result['statements'] > 0, 'Бенчмарк должен считать SQL-запросы.'
+
+
+async def test_investment_benchmark_restores_settings(monkeypatch):
+    async def failed_invest(*args):
+        raise RuntimeError
+
+    monkeypatch.setattr(investment, 'invest_one', failed_invest)
+    default_engine = settings.investment_engine
+    with pytest.raises(RuntimeError):
+        await run('tiny_donations', 'pool', backlog=20, operations=5, seed_value=0)
+    assert settings.investment_engine == default_engine, (
+        'Бенчмарк должен восстанавливать движок распределения при ошибке.'
+    )
+
+
+async def test_google_report_benchmark_runs():
+    result = await google_report.run(projects=30, reports=2)
+    assert result['api_calls'] == {
+        SPREADSHEETS_CREATE: 2,
+        PERMISSIONS_CREATE: 2,
+        VALUES_BATCH_UPDATE: 2,
+    }, 'Бенчмарк отчёта должен считать вызовы Google API.'
+    assert result['discovery_downloads'] == 2, (
+        'Документы discovery должны загружаться один раз за прогон.'
+    )
+    assert not result['failed_reports']
+
+
+async def test_fake_google_records_payloads_and_quota_errors():
+    services = FakeGoogleClientManager(quota_error_every=3)
+    sheets = get_report_sheets([('project', timedelta(hours=1), 'text')], 'now')
+    spreadsheet_id = await spreadsheets_create(
+        services, 'now', get_spreadsheet_body(sheets)
+    )
+    await set_user_permissions(spreadsheet_id, services)
+    with pytest.raises(HTTPError) as error:
+        await spreadsheets_update_value(spreadsheet_id, sheets, services)
+    assert error.value.res.status_code == 429, (
+        'Подменный API должен отвечать ошибкой квоты на каждый N-й вызов.'
+    )
+    assert [payload['method'] for payload in services.payloads] == [
+        SPREADSHEETS_CREATE, PERMISSIONS_CREATE,
+    ], 'Подменный API должен сохранять тела выполненных запросов.'
+    await spreadsheets_update_value(spreadsheet_id, sheets, services)
+    assert services.spreadsheets[spreadsheet_id]['cells'] == 9, (
+        'Подменный API должен записывать значения в созданную таблицу.'
+    )
+    with pytest.raises(HTTPError) as error:
+        await spreadsheets_update_value('unknown', sheets, services)
+    assert error.value.res.status_code == 404
+
+
+async def test_donation_batch_benchmark_runs():
+    result = await donation_batch.run(donations=20, backlog=10)
+    assert result['batch']['statements'] < result['single']['statements'], (
+        'Пакетное создание должно выполнять меньше SQL-запросов, чем одиночное.'
+    )
+    assert 'speedup' in result
@@ -1,6 +1,9 @@
+import csv
+import io
 from datetime import datetime
 
 import pytest
+from sqlalchemy import text
 
 
 @pytest.mark.parametrize(
@@ -85,6 +88,29 @@ def test_create_invalid_full_amount_value(superuser_client, invalid_full_amount)
     ), 'Требуемая сумма (full_amount) проекта должна быть целочисленной и больше 0.'
 
 
+async def test_get_charity_projects_etag_sees_external_writes(user_client, charity_project):
+    from conftest import engine
+    from sqlalchemy import update
+    from app.models import CharityProject
+    response = user_client.get('/charity_project/')
+    etag = response.headers['ETag']
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(CharityProject).where(
+                CharityProject.id == charity_project.id
+            ).values(name='Изменено другим процессом')
+        )
+    response = user_client.get(
+        '/charity_project/', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'Запись в обход сессий приложения должна менять `ETag` списка проектов.'
+    )
+    assert response.json()[0]['name'] == 'Изменено другим процессом', (
+        'После записи другим процессом список не должен браться из кэша.'
+    )
+
+
 def test_get_charity_project(user_client, charity_project):
     response = user_client.get('/charity_project/')
     assert (
@@ -621,3 +647,355 @@ def test_get_all_charity_project_not_auth_user(test_client, charity_project, cha
             'name': 'nunchaku'
         }
     ]
+
+
+def test_get_charity_projects_keyset_pagination(user_client, charity_project, charity_project_nunchaku, small_fully_charity_project):
+    response = user_client.get('/charity_project/', params={'limit': 2})
+    assert response.status_code == 200, (
+        'При запросе страницы проектов должен возвращаться статус-код 200.'
+    )
+    assert [project['id'] for project in response.json()] == [1, 2], (
+        'Страница проектов должна содержать первые `limit` проектов в порядке id.'
+    )
+    cursor = response.headers.get('X-Next-Cursor')
+    assert cursor == '2', (
+        'Для заполненной страницы в заголовке `X-Next-Cursor` должен быть id последнего проекта.'
+    )
+    response = user_client.get('/charity_project/', params={'limit': 2, 'after_id': cursor})
+    assert [project['id'] for project in response.json()] == [3], (
+        'Следующая страница должна начинаться после курсора `after_id`.'
+    )
+    assert 'X-Next-Cursor' not in response.headers, (
+        'Для последней неполной страницы заголовок `X-Next-Cursor` не передаётся.'
+    )
+    response = user_client.get('/charity_project/', params={'fully_invested': True})
+    assert [project['id'] for project in response.json()] == [3], (
+        'Фильтр `fully_invested` должен возвращать только подходящие проекты.'
+    )
+
+
+@pytest.mark.parametrize('params', [
+    {'limit': 0},
+    {'limit': 100000},
+    {'after_id': -1},
+])
+def test_get_charity_projects_invalid_page(user_client, params):
+    response = user_client.get('/charity_project/', params=params)
+    assert response.status_code == 422, (
+        'При некорректных параметрах страницы должен возвращаться статус-код 422.'
+    )
+
+
+def test_export_charity_projects(user_client, charity_project, small_fully_charity_project):
+    response = user_client.get(
+        '/charity_project/export', params={'format': 'csv'}
+    )
+    assert response.status_code == 200, (
+        'При выгрузке проектов должен возвращаться статус-код 200.'
+    )
+    assert response.headers['content-type'].startswith('text/csv'), (
+        'При format=csv выгрузка должна передаваться в формате CSV.'
+    )
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert [row[0] for row in rows] == ['id', '1', '2'], (
+        'CSV-выгрузка должна содержать заголовок и все проекты в порядке id.'
+    )
+    response = user_client.get(
+        '/charity_project/export', params={'format': 'xml'}
+    )
+    assert response.status_code == 422, (
+        'При неизвестном формате выгрузки должен возвращаться статус-код 422.'
+    )
+
+
+def test_get_charity_projects_etag(user_client, superuser_client, charity_project):
+    response = user_client.get('/charity_project/')
+    etag = response.headers.get('ETag')
+    assert etag, 'Список проектов должен передаваться с заголовком `ETag`.'
+    response = user_client.get(
+        '/charity_project/', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 304, (
+        'При совпадении `If-None-Match` с `ETag` должен возвращаться статус-код 304.'
+    )
+    superuser_client.post('/charity_project/', json={
+        'name': 'Мячики для котиков',
+        'description': 'Купим котикам мячики',
+        'full_amount': 100,
+    })
+    response = user_client.get(
+        '/charity_project/', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'После создания проекта список должен возвращаться заново.'
+    )
+    assert response.headers['ETag'] != etag, (
+        'После изменения данных `ETag` списка проектов должен измениться.'
+    )
+    assert len(response.json()) == 2, (
+        'После изменения данных список проектов не должен браться из кэша.'
+    )
+
+
+def test_get_charity_project_by_id(user_client, charity_project):
+    response = user_client.get(f'/charity_project/{charity_project.id}')
+    assert response.status_code == 200, (
+        'При запросе проекта по id должен возвращаться статус-код 200.'
+    )
+    assert response.json() == user_client.get('/charity_project/').json()[0], (
+        'Проект по id должен совпадать с проектом из списка.'
+    )
+    etag = response.headers.get('ETag')
+    response = user_client.get(
+        f'/charity_project/{charity_project.id}',
+        headers={'If-None-Match': etag},
+    )
+    assert response.status_code == 304, (
+        'При совпадении `If-None-Match` с `ETag` должен возвращаться статус-код 304.'
+    )
+    response = user_client.get('/charity_project/100')
+    assert response.status_code == 404, (
+        'При запросе несуществующего проекта должен возвращаться статус-код 404.'
+    )
+
+
+async def test_get_charity_project_sees_external_writes(user_client, charity_project):
+    from conftest import engine
+    from sqlalchemy import update
+    from app.models import CharityProject
+    url = f'/charity_project/{charity_project.id}'
+    etag = user_client.get(url).headers['ETag']
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(CharityProject).where(
+                CharityProject.id == charity_project.id
+            ).values(invested_amount=100)
+        )
+    response = user_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200, (
+        'Запись в обход сессий приложения должна сбрасывать кэш проекта.'
+    )
+    assert response.json()['invested_amount'] == 100, (
+        'После записи другим процессом проект не должен браться из кэша.'
+    )
+
+
+def test_get_charity_project_invalidated(superuser_client, charity_project):
+    url = f'/charity_project/{charity_project.id}'
+    etag = superuser_client.get(url).headers['ETag']
+    superuser_client.patch(url, json={'name': 'Новое имя'})
+    response = superuser_client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200, (
+        'После изменения проекта он не должен отдаваться из кэша.'
+    )
+    assert response.json()['name'] == 'Новое имя', (
+        'После изменения проекта должны возвращаться новые данные.'
+    )
+    superuser_client.delete(url)
+    assert superuser_client.get(url).status_code == 404, (
+        'После удаления проекта он не должен отдаваться из кэша.'
+    )
+
+
+def test_get_charity_project_invested(user_client, charity_project):
+    url = f'/charity_project/{charity_project.id}'
+    user_client.get(url)
+    user_client.post('/donation/', json={'full_amount': 100})
+    assert user_client.get(url).json()['invested_amount'] == 100, (
+        'После распределения пожертвования проект не должен отдаваться из кэша.'
+    )
+
+
+def test_get_charity_projects_changes(user_client, charity_project, charity_project_nunchaku):
+    response = user_client.get('/charity_project/changes')
+    assert response.status_code == 200, (
+        'При запросе ленты изменений должен возвращаться статус-код 200.'
+    )
+    assert [project['id'] for project in response.json()] == [1, 2], (
+        'Без since лента изменений должна содержать все проекты.'
+    )
+    assert {'version', 'updated_at'} <= set(response.json()[0]), (
+        'Объекты ленты изменений должны содержать `version` и `updated_at`.'
+    )
+    since = response.headers['X-Next-Cursor']
+    response = user_client.get('/charity_project/changes', params={'since': since})
+    assert response.json() == [], (
+        'Без изменений лента после курсора должна быть пустой.'
+    )
+    assert response.headers['X-Next-Cursor'] == since, (
+        'Без изменений курсор ленты не должен меняться.'
+    )
+    user_client.post('/donation/', json={'full_amount': 100})
+    response = user_client.get('/charity_project/changes', params={'since': since})
+    data = response.json()
+    assert [project['id'] for project in data] == [1], (
+        'Лента должна содержать только проекты, изменённые после курсора.'
+    )
+    assert data[0]['invested_amount'] == 100 and data[0]['version'] > int(since), (
+        'Изменённый проект должен получить новую версию.'
+    )
+
+
+def test_charity_projects_changes_include_deletions(superuser_client, charity_project, charity_project_nunchaku):
+    since = superuser_client.get('/charity_project/changes').headers['X-Next-Cursor']
+    superuser_client.delete('/charity_project/1')
+    response = superuser_client.get('/charity_project/changes', params={'since': since})
+    data = response.json()
+    assert [(item['id'], item.get('deleted')) for item in data] == [(1, True)], (
+        'Удаление проекта должно попадать в ленту изменений.'
+    )
+    assert data[0]['version'] > int(since), (
+        'Удаление должно получать новую версию.'
+    )
+    assert response.headers['X-Next-Cursor'] == str(data[0]['version'])
+
+
+def test_charity_projects_changes_stop_at_committed_version(user_client, charity_project, charity_project_nunchaku):
+    """Строки с версией выше зафиксированного счётчика ещё не выдаются."""
+    from conftest import engine
+
+    async def set_versions(*statements):
+        async with engine.begin() as conn:
+            for statement in statements:
+                await conn.execute(text(statement))
+
+    since = user_client.get('/charity_project/changes').headers['X-Next-Cursor']
+    user_client.portal.call(
+        set_versions, 'UPDATE charityproject SET version = 1000 WHERE id = 2'
+    )
+    response = user_client.get('/charity_project/changes', params={'since': since})
+    assert response.json() == [], test_charity_projects_changes_stop_at_committed_version.__doc__
+    assert response.headers['X-Next-Cursor'] == since
+    user_client.portal.call(
+        set_versions, 'UPDATE changeversion SET value = 1000'
+    )
+    response = user_client.get('/charity_project/changes', params={'since': since})
+    assert [project['id'] for project in response.json()] == [2], (
+        'Строка должна попадать в ленту, когда её версия зафиксирована.'
+    )
+
+
+def test_investment_shares_change_version(user_client, charity_project):
+    """Все записи одной транзакции получают одну версию изменений."""
+    from conftest import engine
+
+    async def get_versions():
+        async with engine.connect() as conn:
+            result = await conn.execute(text(
+                'SELECT (SELECT version FROM charityproject WHERE id = 1), '
+                '(SELECT version FROM donation WHERE id = 1), '
+                '(SELECT value FROM changeversion)'
+            ))
+            return tuple(result.one())
+
+    before = user_client.portal.call(get_versions)
+    user_client.post('/donation/', json={'full_amount': 100})
+    project_version, donation_version, counter = user_client.portal.call(
+        get_versions
+    )
+    assert project_version == donation_version == counter > before[2], (
+        test_investment_shares_change_version.__doc__
+    )
+
+
+def test_bulk_close_charity_projects(superuser_client, charity_project_little_invested, charity_project_nunchaku, small_fully_charity_project):
+    response = superuser_client.patch('/charity_project/bulk', json={
+        'ids': [1, 2, 3, 100],
+        'close': True,
+    })
+    assert response.status_code == 200, (
+        'При массовом закрытии проектов должен возвращаться статус-код 200.'
+    )
+    assert response.json() == {'updated': [1], 'skipped': [2, 3, 100]}, (
+        'Закрыть можно только открытые проекты с вложенными средствами.'
+    )
+    project = superuser_client.get('/charity_project/1').json()
+    assert project['fully_invested'] and project['full_amount'] == 100, (
+        'Закрытый проект должен получить требуемую сумму, равную вложенной.'
+    )
+    assert superuser_client.get('/statistics/').json()['open_projects'] == 1, (
+        'Массовое закрытие проектов должно учитываться в статистике.'
+    )
+
+
+def test_bulk_retarget_charity_projects(superuser_client, investment_engine, charity_project_little_invested, charity_project_nunchaku, donation):
+    response = superuser_client.patch('/charity_project/bulk', json={
+        'ids': [1, 2],
+        'full_amount': 150,
+        'description': 'Новое описание',
+    })
+    assert response.json() == {'updated': [1, 2], 'skipped': []}, (
+        'Новую сумму можно установить проектам, в которые вложено не больше неё.'
+    )
+    projects = superuser_client.get('/charity_project/').json()
+    assert [
+        (project['full_amount'], project['invested_amount'],
+         project['fully_invested'], project['description'])
+        for project in projects
+    ] == [
+        (150, 150, True, 'Новое описание'),
+        (150, 50, False, 'Новое описание'),
+    ], (
+        'После изменения суммы открытые проекты должны получить '
+        'свободные пожертвования в порядке создания.'
+    )
+
+
+@pytest.mark.parametrize('invested_amount, result, full_amount, open_projects', [
+    (600, {'updated': [], 'skipped': [1]}, 1000000, 1),
+    (200, {'updated': [1], 'skipped': []}, 200, 0),
+])
+def test_bulk_update_sees_concurrent_investment(monkeypatch, superuser_client, charity_project, invested_amount, result, full_amount, open_projects):
+    from conftest import engine
+    from sqlalchemy import update
+    from app.crud.charity_project import charity_project_crud
+    from app.models import CharityProject
+    bulk_update = charity_project_crud.bulk_update
+
+    async def invest_before_update(*args, **kwargs):
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(CharityProject).where(
+                    CharityProject.id == charity_project.id
+                ).values(invested_amount=invested_amount)
+            )
+        return await bulk_update(*args, **kwargs)
+
+    monkeypatch.setattr(charity_project_crud, 'bulk_update', invest_before_update)
+    response = superuser_client.patch('/charity_project/bulk', json={
+        'ids': [1], 'full_amount': 200,
+    })
+    assert response.json() == result, (
+        'Средства, вложенные другой транзакцией, должны учитываться '
+        'при массовом изменении проектов.'
+    )
+    project = superuser_client.get('/charity_project/1').json()
+    assert project['full_amount'] == full_amount, (
+        'Требуемая сумма не должна становиться меньше вложенной.'
+    )
+    assert superuser_client.get('/statistics/').json()['open_projects'] == open_projects, (
+        'Счётчик открытых проектов должен учитывать строки, изменённые UPDATE.'
+    )
+
+
+@pytest.mark.parametrize('json', [
+    {'ids': [1]},
+    {'ids': [], 'close': True},
+    {'ids': [1], 'close': True, 'full_amount': 10},
+    {'ids': [1], 'full_amount': 0},
+    {'ids': [1], 'name': 'Новое имя'},
+])
+def test_bulk_update_charity_projects_invalid(superuser_client, charity_project, json):
+    response = superuser_client.patch('/charity_project/bulk', json=json)
+    assert response.status_code == 422, (
+        'При некорректном массовом изменении должен возвращаться статус-код 422.'
+    )
+
+
+def test_bulk_update_charity_projects_usual_user(user_client, charity_project):
+    response = user_client.patch('/charity_project/bulk', json={
+        'ids': [1], 'close': True,
+    })
+    assert response.status_code == 401, (
+        'Массовое изменение проектов должно быть доступно только суперюзерам.'
+    )
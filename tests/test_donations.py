@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 from datetime import datetime
 
 import pytest
@@ -178,3 +181,148 @@ def test_create_donation_check_create_date(user_client):
     assert response_1.json()['create_date'] != response_2.json()['create_date'], (
         'При создании двух пожертвований с паузой (в 1 секунду, например) у них должны быть разные `create_date`'
     )
+
+
+def test_create_donations_batch(user_client, charity_project_little_invested, charity_project_nunchaku):
+    response = user_client.post('/donation/batch', json=[
+        {'full_amount': 500000, 'comment': 'First'},
+        {'full_amount': 499900},
+        {'full_amount': 100},
+    ])
+    assert response.status_code == 200, (
+        'При пакетном создании пожертвований должен возвращаться статус-код 200.'
+    )
+    data = response.json()
+    assert [item['full_amount'] for item in data] == [500000, 499900, 100], (
+        'Ответ на пакетное создание должен содержать пожертвования в порядке запроса.'
+    )
+    assert sorted(data[0].keys()) == ['comment', 'create_date', 'full_amount', 'id'], (
+        'Элементы ответа на пакетное создание должны совпадать с ответом на одиночное создание.'
+    )
+    assert charity_project_little_invested.fully_invested, (
+        'Пакет пожертвований должен распределяться по проектам по принципу FIFO.'
+    )
+    assert charity_project_nunchaku.invested_amount == 100, (
+        'Остаток пакета пожертвований должен перейти в следующий проект.'
+    )
+    statistics = user_client.get('/statistics/').json()
+    assert (statistics['donations_count'], statistics['donation_amount']) == (3, 1000000), (
+        'Пакет пожертвований должен учитываться в статистике фонда.'
+    )
+
+
+@pytest.mark.parametrize('json', [
+    [],
+    [{'full_amount': 10}, {'full_amount': -1}],
+    {'full_amount': 10},
+])
+def test_create_donations_batch_invalid(user_client, json):
+    response = user_client.post('/donation/batch', json=json)
+    assert response.status_code == 422, (
+        'При некорректном теле POST-запроса к эндпоинту `/donation/batch` '
+        'должен вернуться статус-код 422.'
+    )
+
+
+def test_get_all_donations_filters(superuser_client, donation, another_donation):
+    response = superuser_client.get('/donation/', params={'user_id': 1})
+    assert [item['id'] for item in response.json()] == [2], (
+        'Фильтр `user_id` должен возвращать только пожертвования пользователя.'
+    )
+    response = superuser_client.get('/donation/', params={
+        'created_from': '2012-01-01T00:00:00',
+    })
+    assert [item['id'] for item in response.json()] == [2], (
+        'Фильтр `created_from` должен отсекать более ранние пожертвования.'
+    )
+    response = superuser_client.get('/donation/', params={'limit': 1})
+    assert response.headers.get('X-Next-Cursor') == '1', (
+        'Для заполненной страницы в заголовке `X-Next-Cursor` должен быть id последнего пожертвования.'
+    )
+
+
+def test_export_donations_ndjson(superuser_client, donation, another_donation):
+    response = superuser_client.get('/donation/export', params={'user_id': 2})
+    assert response.status_code == 200, (
+        'При выгрузке пожертвований должен возвращаться статус-код 200.'
+    )
+    assert response.headers['content-type'] == 'application/x-ndjson', (
+        'По умолчанию выгрузка должна передаваться в формате NDJSON.'
+    )
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [{
+        'id': 1,
+        'user_id': 2,
+        'comment': 'To you for chimichangas',
+        'full_amount': 100,
+        'invested_amount': 0,
+        'fully_invested': False,
+        'create_date': '2011-11-11T00:00:00',
+    }], (
+        'Выгрузка должна содержать пожертвования, отобранные фильтрами списка.'
+    )
+
+
+def test_export_donations_csv_gzip(superuser_client, donation, another_donation):
+    response = superuser_client.get(
+        '/donation/export', params={'format': 'csv', 'gzip': True}
+    )
+    assert response.headers.get('content-encoding') == 'gzip', (
+        'При gzip=true выгрузка должна передаваться с Content-Encoding: gzip.'
+    )
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert len(rows) == 3 and rows[0][:2] == ['id', 'user_id'], (
+        'CSV-выгрузка должна содержать заголовок и строку на каждое пожертвование.'
+    )
+    assert rows[2][-1] == '', (
+        'Пустые значения в CSV-выгрузке должны передаваться пустой строкой.'
+    )
+
+
+def test_export_donations_user(user_client, donation):
+    response = user_client.get('/donation/export')
+    assert response.status_code == 401, (
+        'Выгрузка пожертвований должна быть доступна только суперюзерам.'
+    )
+
+
+def test_get_user_donations_summary(user_client, donation, another_donation):
+    response = user_client.get('/donation/my/summary')
+    assert response.status_code == 200, (
+        'При запросе итогов пожертвований должен возвращаться статус-код 200.'
+    )
+    assert response.json() == {
+        'count': 1,
+        'total_amount': 100,
+        'invested_amount': 0,
+        'remaining_amount': 100,
+        'last_donation_date': '2011-11-11T00:00:00',
+    }, (
+        'Итоги должны учитывать только пожертвования пользователя.'
+    )
+
+
+def test_get_user_donations_summary_empty(user_client):
+    response = user_client.get('/donation/my/summary')
+    assert response.json() == {
+        'count': 0,
+        'total_amount': 0,
+        'invested_amount': 0,
+        'remaining_amount': 0,
+        'last_donation_date': None,
+    }, (
+        'Для пользователя без пожертвований итоги должны быть нулевыми.'
+    )
+
+
+def test_get_donations_changes(superuser_client, donation, another_donation, charity_project):
+    response = superuser_client.get('/donation/changes', params={'limit': 1})
+    assert [item['id'] for item in response.json()] == [1], (
+        'Лента изменений должна возвращать пожертвования в порядке версии.'
+    )
+    response = superuser_client.get('/donation/changes', params={
+        'since': response.headers['X-Next-Cursor'],
+    })
+    assert [item['id'] for item in response.json()] == [2], (
+        'Следующая страница ленты должна начинаться после курсора.'
+    )
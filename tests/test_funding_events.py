@@ -0,0 +1,72 @@
+import asyncio
+
+from app.services.funding_events import (
+    KEEPALIVE_MESSAGE, FundingBroker, format_event, funding_broker,
+    stream_funding_events
+)
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_donation_publishes_funding(user_client, investment_engine, small_fully_charity_project, charity_project, charity_project_nunchaku):
+    with funding_broker.subscribe() as queue:
+        user_client.post('/donation/', json={'full_amount': 1000100})
+        events = drain(queue)
+    assert sorted(events, key=lambda item: item['project_id']) == [
+        {'project_id': 2, 'invested_amount': 1000000, 'fully_invested': True},
+        {'project_id': 3, 'invested_amount': 100, 'fully_invested': False},
+    ], (
+        'После распределения пожертвования подписчики должны получить '
+        'состояние каждого профинансированного проекта.'
+    )
+
+
+def test_project_publishes_funding(superuser_client, investment_engine, donation):
+    with funding_broker.subscribe() as queue:
+        superuser_client.post('/charity_project/', json={
+            'name': 'Мячики',
+            'description': 'Мячики для котиков',
+            'full_amount': 50,
+        })
+        events = drain(queue)
+    assert events == [
+        {'project_id': 1, 'invested_amount': 50, 'fully_invested': True},
+    ], (
+        'После создания проекта подписчики должны получить его состояние.'
+    )
+    assert not funding_broker.subscribers, (
+        'После отписки очередь подписчика должна удаляться из рассылки.'
+    )
+
+
+def test_broker_drops_oldest_events():
+    broker = FundingBroker(buffer_size=2)
+    with broker.subscribe() as queue:
+        broker.publish([{'project_id': number} for number in range(3)])
+        assert drain(queue) == [{'project_id': 1}, {'project_id': 2}], (
+            'При переполнении буфера подписчик должен терять самые старые события.'
+        )
+
+
+def test_format_event():
+    assert format_event({'project_id': 1}) == 'data: {"project_id": 1}\n\n', (
+        'Событие должно передаваться в формате server-sent events.'
+    )
+
+
+def test_stream_sends_keepalive():
+    async def first_message():
+        stream = stream_funding_events(keepalive=0.01)
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    assert asyncio.run(first_message()) == KEEPALIVE_MESSAGE, (
+        'Без событий поток должен периодически отправлять keep-alive.'
+    )
@@ -0,0 +1,197 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from conftest import TestingSessionLocal
+from fastapi import HTTPException
+
+from app.crud.charity_project import charity_project_crud
+from app.services import google_api
+from app.services.google_api import (
+    get_batch_update_bodies, get_report_sheets, get_spreadsheet_body,
+    spreadsheets_update_value
+)
+
+
+def make_projects(count):
+    return [
+        (f'project {number}', timedelta(minutes=number), 'description')
+        for number in range(count)
+    ]
+
+
+class FakeServices:
+
+    def __init__(self):
+        self.requests = []
+        values = SimpleNamespace(batchUpdate=lambda **kwargs: kwargs)
+        self.service = SimpleNamespace(
+            spreadsheets=SimpleNamespace(values=values)
+        )
+
+    async def discover(self, api_name, api_version):
+        return self.service
+
+    async def as_service_account(self, request):
+        self.requests.append(request)
+
+
+def test_report_sheets_split_rows():
+    sheets = get_report_sheets(make_projects(25), 'now', sheet_rows=10)
+    assert [len(sheet) for sheet in sheets] == [13, 13, 8], (
+        'Строки отчёта должны делиться на листы с заголовком на каждом.'
+    )
+    assert sheets[0][3] == ['project 0', '0:00:00', 'description'], (
+        'Строки отчёта должны идти в порядке проектов.'
+    )
+    assert len(get_report_sheets([], 'now')) == 1, (
+        'Пустой отчёт должен содержать один лист с заголовком.'
+    )
+
+
+def test_spreadsheet_body_sized_from_data():
+    sheets = get_report_sheets(make_projects(25), 'now', sheet_rows=10)
+    body = get_spreadsheet_body(sheets)
+    assert [
+        (
+            sheet['properties']['title'],
+            sheet['properties']['gridProperties']['rowCount'],
+            sheet['properties']['gridProperties']['columnCount'],
+        ) for sheet in body['sheets']
+    ] == [('Лист1', 13, 3), ('Лист2', 13, 3), ('Лист3', 8, 3)], (
+        'Размер листов таблицы должен определяться данными отчёта.'
+    )
+
+
+def test_spreadsheet_body_too_large(monkeypatch):
+    monkeypatch.setattr(google_api, 'MAX_CELLS', 10)
+    with pytest.raises(HTTPException):
+        get_spreadsheet_body(get_report_sheets(make_projects(5), 'now'))
+
+
+def test_batch_update_bodies():
+    sheets = get_report_sheets(make_projects(25), 'now', sheet_rows=10)
+    bodies = get_batch_update_bodies(sheets, batch_rows=26)
+    assert [
+        [item['range'] for item in body['data']] for body in bodies
+    ] == [
+        ["'Лист1'!R1C1:R13C3", "'Лист2'!R1C1:R13C3"],
+        ["'Лист3'!R1C1:R8C3"],
+    ], (
+        'Листы должны отправляться группами в запросах values.batchUpdate.'
+    )
+
+
+def test_batch_update_bodies_split_by_size():
+    sheets = get_report_sheets(make_projects(25), 'now', sheet_rows=10)
+    row_bytes = len(json.dumps(sheets[0][-1])) + 1
+    bodies = get_batch_update_bodies(sheets, batch_bytes=row_bytes * 6)
+    for body in bodies:
+        assert sum(
+            len(json.dumps(row)) + 1
+            for item in body['data'] for row in item['values']
+        ) <= row_bytes * 6, (
+            'Запрос values.batchUpdate не должен превышать batch_bytes байт.'
+        )
+    for number, sheet in enumerate(sheets):
+        values = [
+            row for body in bodies for item in body['data']
+            if item['range'].startswith(f"'Лист{number + 1}'")
+            for row in item['values']
+        ]
+        assert values == sheet, (
+            'Лист, разделённый по размеру, должен передаваться целиком и по порядку.'
+        )
+    ranges = [item['range'] for body in bodies for item in body['data']]
+    assert ranges[:3] == [
+        "'Лист1'!R1C1:R2C3", "'Лист1'!R3C1:R3C3", "'Лист1'!R4C1:R9C3"
+    ], (
+        'Части листа должны записываться в свои диапазоны строк.'
+    )
+
+
+async def test_spreadsheets_update_value_batches():
+    services = FakeServices()
+    sheets = get_report_sheets(make_projects(12000), 'now')
+    await spreadsheets_update_value('spreadsheet', sheets, services)
+    assert len(services.requests) == 1, (
+        'Листы отчёта должны записываться общим запросом values.batchUpdate.'
+    )
+    data = services.requests[0]['json']['data']
+    assert sum(len(item['values']) for item in data) == 12000 + 3 * len(sheets), (
+        'Все строки отчёта должны быть переданы в таблицу.'
+    )
+
+
+@pytest.fixture
+def closed_projects(mixer):
+    start = datetime(2020, 1, 1)
+    for name, hours, closed in (
+        ('slow', 48, 10), ('fast', 1, 2), ('medium', 5, 20),
+    ):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description=f'{name} project',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=start + timedelta(days=closed) - timedelta(hours=hours),
+            close_date=start + timedelta(days=closed),
+        )
+
+
+async def test_projects_ranked_by_subsecond_duration(mixer):
+    start = datetime(2020, 1, 1, 10)
+    for name, created, closed in (
+        ('whole', 0, 800), ('crossing', 900, 1100),
+    ):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description=f'{name} project',
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=start + timedelta(milliseconds=created),
+            close_date=start + timedelta(milliseconds=closed),
+        )
+    async with TestingSessionLocal() as session:
+        projects = await charity_project_crud.get_projects_by_completion_rate(
+            session
+        )
+    assert projects == [
+        ('crossing', timedelta(milliseconds=200), 'crossing project'),
+        ('whole', timedelta(milliseconds=800), 'whole project'),
+    ], (
+        'Время сбора должно учитывать доли секунды.'
+    )
+
+
+async def test_projects_ranked_by_duration(closed_projects, charity_project):
+    async with TestingSessionLocal() as session:
+        projects = await charity_project_crud.get_projects_by_completion_rate(
+            session
+        )
+        limited = await charity_project_crud.get_projects_by_completion_rate(
+            session, limit=1
+        )
+        window = await charity_project_crud.get_projects_by_completion_rate(
+            session,
+            closed_from=datetime(2020, 1, 5),
+            closed_to=datetime(2020, 1, 15),
+        )
+    assert projects == [
+        ('fast', timedelta(hours=1), 'fast project'),
+        ('medium', timedelta(hours=5), 'medium project'),
+        ('slow', timedelta(hours=48), 'slow project'),
+    ], (
+        'Закрытые проекты должны упорядочиваться по времени сбора в запросе.'
+    )
+    assert limited == projects[:1], (
+        'Параметр limit должен ограничивать число проектов в отчёте.'
+    )
+    assert [name for name, _, _ in window] == ['slow'], (
+        'Отчёт должен ограничиваться окном по дате закрытия.'
+    )
@@ -1,4 +1,7 @@
 import types
+
+from aiogoogle.auth.utils import _get_expires_at
+
 try:
     from app.core import google_client
 except (NameError, ImportError):
@@ -53,3 +56,54 @@ def test_connect():
     assert isinstance(service, types.AsyncGeneratorType), (
         'Функция `google_client.get_service` должна возвращать асинхронный генератор.'
     )
+
+
+DISCOVERY_DOCUMENT = {'name': 'sheets', 'version': 'v4', 'resources': {}}
+
+
+def make_manager(monkeypatch, cache_dir):
+    manager = google_client.GoogleClientManager(cache_dir=cache_dir)
+    downloads = []
+
+    async def download_document(api_name, api_version):
+        downloads.append((api_name, api_version))
+        return dict(DISCOVERY_DOCUMENT, name=api_name, version=api_version)
+
+    monkeypatch.setattr(manager, 'download_document', download_document)
+    return manager, downloads
+
+
+async def test_discovery_cached(monkeypatch, tmp_path):
+    manager, downloads = make_manager(monkeypatch, tmp_path)
+    first = await manager.discover('sheets', 'v4')
+    second = await manager.discover('sheets', 'v4')
+    assert first is second and downloads == [('sheets', 'v4')], (
+        'Документ discovery должен загружаться один раз за процесс.'
+    )
+    manager, downloads = make_manager(monkeypatch, tmp_path)
+    service = await manager.discover('sheets', 'v4')
+    assert not downloads, (
+        'Сохранённый документ discovery должен читаться с диска.'
+    )
+    assert service.discovery_document['name'] == 'sheets'
+
+
+async def test_warm_up_reuses_token(monkeypatch, tmp_path):
+    manager, downloads = make_manager(monkeypatch, tmp_path)
+    account = manager.aiogoogle.service_account_manager
+    grants = []
+
+    async def get_grant():
+        grants.append(True)
+        account._access_token = 'token'
+        account._expires_at = _get_expires_at(3600)
+
+    monkeypatch.setattr(account, '_get_oauth2_authorization_grant', get_grant)
+    await manager.warm_up()
+    await manager.warm_up()
+    assert downloads == list(google_client.APIS), (
+        'Прогрев должен загружать документы discovery всех используемых API.'
+    )
+    assert len(grants) == 1, (
+        'Токен сервисного аккаунта должен переиспользоваться до истечения.'
+    )
@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+from conftest import TestingSessionLocal, engine
+from sqlalchemy import event
+
+from app.crud.base import CRUDBase
+from app.crud.charity_project import charity_project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject, Donation
+from app.models.user import User
+
+
+async def stream_not_invested_projects(session):
+    await (await CRUDBase.stream_not_invested(CharityProject, session)).close()
+
+
+async def stream_not_invested_donations(session):
+    await (await CRUDBase.stream_not_invested(Donation, session)).close()
+
+
+async def get_donations_by_user(session):
+    await donation_crud.get_by_user(session, User(id=1))
+
+
+async def get_donations_summary(session):
+    await donation_crud.get_user_summary(session, User(id=1))
+
+
+async def rank_closed_projects(session):
+    await charity_project_crud.get_projects_by_completion_rate(
+        session, limit=10
+    )
+
+
+async def list_open_projects(session):
+    await charity_project_crud.get_multi(
+        session, after_id=10, limit=10, fully_invested=False
+    )
+
+
+async def list_closed_projects(session):
+    await charity_project_crud.get_multi(
+        session, after_id=10, limit=10, fully_invested=True
+    )
+
+
+async def list_open_donations(session):
+    await donation_crud.get_multi(
+        session, after_id=10, limit=10, fully_invested=False
+    )
+
+
+async def list_user_donations(session):
+    await donation_crud.get_multi(session, after_id=10, limit=10, user_id=1)
+
+
+async def list_donations_by_date(session):
+    await donation_crud.get_multi(
+        session, limit=10,
+        created_from=datetime(2010, 1, 1), created_to=datetime(2011, 1, 1),
+    )
+
+
+async def get_project_changes(session):
+    await session.execute(charity_project_crud.get_changes_query(10, 20))
+
+
+async def get_project_deletions(session):
+    await session.execute(charity_project_crud.get_deletions_query(10, 20))
+
+
+async def explain(query):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        async with TestingSessionLocal() as session:
+            await query(session)
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = await conn.exec_driver_sql(
+                f'EXPLAIN QUERY PLAN {statement}', parameters
+            )
+            plans.append(' '.join(row[-1] for row in plan))
+    return plans
+
+
+@pytest.mark.parametrize('query, index, ordered', [
+    (stream_not_invested_projects, 'ix_charityproject_open_create_date', True),
+    (stream_not_invested_donations, 'ix_donation_open_create_date', True),
+    (get_donations_by_user, 'ix_donation_user_id', True),
+    (get_donations_summary, 'ix_donation_user_id', True),
+    (rank_closed_projects, 'ix_charityproject_closed_id', False),
+    (list_open_projects, 'ix_charityproject_open_id', True),
+    (list_closed_projects, 'ix_charityproject_closed_id', True),
+    (list_open_donations, 'ix_donation_open_id', True),
+    (list_user_donations, 'ix_donation_user_id', True),
+    (list_donations_by_date, 'ix_donation_create_date', False),
+    (get_project_changes, 'ix_charityproject_version', True),
+    (get_project_deletions, 'ix_tombstone_table_version', True),
+])
+async def test_hot_query_uses_index(query, index, ordered):
+    plans = await explain(query)
+    assert plans, f'Запрос `{query.__name__}` не выполнил ни одного SQL-запроса.'
+    for plan in plans:
+        assert index in plan, (
+            f'Запрос `{query.__name__}` должен использовать индекс `{index}`, '
+            f'план запроса: {plan}'
+        )
+        assert not ordered or 'TEMP B-TREE' not in plan, (
+            f'Запрос `{query.__name__}` не должен сортировать строки без индекса, '
+            f'план запроса: {plan}'
+        )
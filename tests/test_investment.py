@@ -45,3 +45,186 @@ def test_donation_to_little_invest_project(user_client, charity_project_little_i
     assert charity_project_little_invested.invested_amount == 1000, test_donation_to_little_invest_project.__doc__
     assert not charity_project_nunchaku.fully_invested, test_donation_to_little_invest_project.__doc__
     assert charity_project_nunchaku.invested_amount == 0, test_donation_to_little_invest_project.__doc__
+
+
+def test_engine_fully_invested_amount_for_two_projects(user_client, investment_engine, charity_project, charity_project_nunchaku):
+    """Пожертвования полностью покрывают первый проект, второй проект не затронут."""
+    user_client.post('/donation/', json={'full_amount': 500000})
+    user_client.post('/donation/', json={'full_amount': 500000})
+    assert charity_project.fully_invested, test_engine_fully_invested_amount_for_two_projects.__doc__
+    assert charity_project.close_date is not None, test_engine_fully_invested_amount_for_two_projects.__doc__
+    assert not charity_project_nunchaku.fully_invested, test_engine_fully_invested_amount_for_two_projects.__doc__
+    assert charity_project_nunchaku.invested_amount == 0, test_engine_fully_invested_amount_for_two_projects.__doc__
+
+
+def test_engine_donation_to_little_invest_project(user_client, investment_engine, charity_project_little_invested, charity_project_nunchaku):
+    """Частично инвестированный проект пополняется, второй проект не затронут."""
+    response = user_client.post('/donation/', json={'full_amount': 900})
+    assert response.status_code == 200, test_engine_donation_to_little_invest_project.__doc__
+    assert not charity_project_little_invested.fully_invested, test_engine_donation_to_little_invest_project.__doc__
+    assert charity_project_little_invested.invested_amount == 1000, test_engine_donation_to_little_invest_project.__doc__
+    assert charity_project_nunchaku.invested_amount == 0, test_engine_donation_to_little_invest_project.__doc__
+
+
+def test_engine_project_closes_donations(superuser_client, investment_engine, donation, another_donation):
+    """Новый проект забирает пожертвования по порядку, закрывая покрытые и частично используя граничное."""
+    response = superuser_client.post('/charity_project/', json={
+        'name': 'Мертвый Бассейн',
+        'description': 'Deadpool inside',
+        'full_amount': 1000,
+    })
+    data = response.json()
+    assert data['invested_amount'] == 1000, test_engine_project_closes_donations.__doc__
+    assert data['fully_invested'], test_engine_project_closes_donations.__doc__
+    assert donation.fully_invested, test_engine_project_closes_donations.__doc__
+    assert donation.invested_amount == 100, test_engine_project_closes_donations.__doc__
+    assert not another_donation.fully_invested, test_engine_project_closes_donations.__doc__
+    assert another_donation.invested_amount == 900, test_engine_project_closes_donations.__doc__
+
+
+def test_engine_project_without_enough_donations(superuser_client, investment_engine, donation):
+    """Если пожертвований не хватает, проект получает всё доступное и остаётся открытым."""
+    response = superuser_client.post('/charity_project/', json={
+        'name': 'Мертвый Бассейн',
+        'description': 'Deadpool inside',
+        'full_amount': 1000,
+    })
+    data = response.json()
+    assert data['invested_amount'] == 100, test_engine_project_without_enough_donations.__doc__
+    assert not data['fully_invested'], test_engine_project_without_enough_donations.__doc__
+    assert donation.fully_invested, test_engine_project_without_enough_donations.__doc__
+
+
+def test_engine_sees_projects_created_elsewhere(user_client, investment_engine, charity_project, mixer):
+    """Проект, созданный в обход приложения, получает следующие пожертвования."""
+    user_client.post('/donation/', json={'full_amount': 1000000})
+    nunchaku = mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='nunchaku',
+        description='Nunchaku is better',
+        full_amount=5000000,
+    )
+    user_client.post('/donation/', json={'full_amount': 100})
+    assert charity_project.fully_invested, test_engine_sees_projects_created_elsewhere.__doc__
+    assert nunchaku.invested_amount == 100, test_engine_sees_projects_created_elsewhere.__doc__
+
+
+@pytest.fixture
+def investment_queue(monkeypatch):
+    from conftest import TestingSessionLocal
+    from app.core.config import settings
+    from app.services.investment_queue import investment_queue
+    monkeypatch.setattr(settings, 'investment_mode', 'queue')
+    monkeypatch.setattr(investment_queue, 'session_factory', TestingSessionLocal)
+    return investment_queue
+
+
+def test_queue_mode_invests_in_background(investment_queue, user_client, charity_project, charity_project_nunchaku):
+    """В режиме очереди пожертвования сохраняются сразу, а распределяются фоновым обработчиком."""
+    responses = [
+        user_client.post('/donation/', json={'full_amount': 600000})
+        for _ in range(2)
+    ]
+    for response in responses:
+        assert response.status_code == 200, test_queue_mode_invests_in_background.__doc__
+        assert response.json()['investment_status'] == 'pending', test_queue_mode_invests_in_background.__doc__
+    user_client.portal.call(investment_queue.join)
+    assert charity_project.fully_invested, test_queue_mode_invests_in_background.__doc__
+    assert charity_project_nunchaku.invested_amount == 200000, test_queue_mode_invests_in_background.__doc__
+
+
+async def test_pool_ignores_rolled_back_investment(monkeypatch, mixer):
+    """Распределение из отменённой транзакции не меняет индекс открытых проектов."""
+    from conftest import TestingSessionLocal
+    from app.core.config import settings
+    from app.crud.donation import donation_crud
+    from app.models import CharityProject
+    from app.schemas.donation import DonationCreate
+    from app.services.investment import project_invest
+    from app.services.open_pool import open_pool
+    first, second = [
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            description=name,
+            full_amount=100,
+            invested_amount=0,
+            fully_invested=False,
+        ) for name in ('first', 'second')
+    ]
+    open_pool.clear()
+    monkeypatch.setattr(settings, 'investment_engine', 'pool')
+    for commit in (False, True):
+        async with TestingSessionLocal() as session:
+            donation = await donation_crud.create(
+                DonationCreate(full_amount=100), session, commit=False
+            )
+            await project_invest(donation, session)
+            if commit:
+                await session.commit()
+            else:
+                await session.rollback()
+    open_pool.clear()
+    async with TestingSessionLocal() as session:
+        first = await session.get(CharityProject, first.id)
+        second = await session.get(CharityProject, second.id)
+        assert first.fully_invested, test_pool_ignores_rolled_back_investment.__doc__
+        assert second.invested_amount == 0, test_pool_ignores_rolled_back_investment.__doc__
+
+
+def test_queue_reconciles_open_donations_on_startup(investment_queue, charity_project, donation, user_client):
+    """При запуске очередь распределяет пожертвования, оставшиеся открытыми."""
+    user_client.portal.call(investment_queue.join)
+    response = user_client.get(f'/charity_project/{charity_project.id}')
+    assert response.json()['invested_amount'] == 100, test_queue_reconciles_open_donations_on_startup.__doc__
+    assert 'investment_status' not in response.json(), test_queue_reconciles_open_donations_on_startup.__doc__
+
+
+def test_queue_retries_failed_batch(monkeypatch, investment_queue, user_client, charity_project):
+    """Неудачная пачка возвращается в очередь и распределяется повторно."""
+    process = investment_queue.process
+    calls = []
+
+    async def flaky_process(jobs):
+        calls.append(jobs)
+        if len(calls) == 1:
+            raise RuntimeError
+        await process(jobs)
+
+    monkeypatch.setattr(investment_queue, 'process', flaky_process)
+    monkeypatch.setattr(investment_queue, 'retry_delay', 0)
+    response = user_client.post('/donation/', json={'full_amount': 100})
+    user_client.portal.call(investment_queue.join)
+    assert len(calls) == 2, test_queue_retries_failed_batch.__doc__
+    response = user_client.get(f'/charity_project/{charity_project.id}')
+    assert response.json()['invested_amount'] == 100, test_queue_retries_failed_batch.__doc__
+
+
+def test_queue_status_visible_after_post(monkeypatch, investment_queue, user_client, charity_project):
+    """Статус нераспределённого пожертвования и проекта виден при чтении."""
+    async def failed_process(jobs):
+        raise RuntimeError
+
+    monkeypatch.setattr(investment_queue, 'process', failed_process)
+    monkeypatch.setattr(investment_queue, 'retry_delay', 0)
+    monkeypatch.setattr(investment_queue, 'max_attempts', 2)
+    user_client.post('/donation/', json={'full_amount': 100})
+    user_client.portal.call(investment_queue.join)
+    response = user_client.get('/donation/my')
+    assert response.json()[0]['investment_status'] == 'pending', test_queue_status_visible_after_post.__doc__
+    response = user_client.get(f'/charity_project/{charity_project.id}')
+    assert response.json()['investment_status'] == 'pending', test_queue_status_visible_after_post.__doc__
+
+
+async def test_queue_put_starts_worker(charity_project, donation):
+    """Постановка в очередь запускает обработчик, если он ещё не запущен."""
+    from conftest import TestingSessionLocal
+    from app.services.investment_queue import InvestmentQueue
+    queue = InvestmentQueue(session_factory=TestingSessionLocal)
+    assert queue.put(donation) == 'pending', test_queue_put_starts_worker.__doc__
+    await queue.join()
+    await queue.stop()
+    from app.models import CharityProject
+    async with TestingSessionLocal() as session:
+        charity_project = await session.get(CharityProject, charity_project.id)
+        assert charity_project.invested_amount == 100, test_queue_put_starts_worker.__doc__
@@ -0,0 +1,37 @@
+from conftest import TestingSessionLocal
+
+from app.models import CharityProject, Donation
+from app.services.ledger import check_ledger
+
+
+async def test_ledger_consistent_after_investment(user_client, charity_project, charity_project_nunchaku):
+    user_client.post('/donation/', json={'full_amount': 1000000})
+    user_client.post('/donation/', json={'full_amount': 300})
+    async with TestingSessionLocal() as session:
+        report = await check_ledger(session)
+    for model in (CharityProject, Donation):
+        assert report[model][2].size == 0, (
+            'После распределения через API сверка не должна находить расхождений.'
+        )
+
+
+async def test_ledger_fixes_drift(charity_project, donation):
+    async with TestingSessionLocal() as session:
+        report = await check_ledger(session, fix=True)
+    assert report[CharityProject][2].size == 1, (
+        'Проект, не получивший доступное пожертвование, должен попасть в расхождения.'
+    )
+    assert report[Donation][2].size == 1, (
+        'Нераспределённое пожертвование при открытом проекте должно попасть в расхождения.'
+    )
+    assert charity_project.invested_amount == 100, (
+        'После исправления проект должен получить сумму пожертвования.'
+    )
+    assert donation.fully_invested and donation.close_date is not None, (
+        'После исправления пожертвование должно быть закрыто с датой закрытия.'
+    )
+    async with TestingSessionLocal() as session:
+        report = await check_ledger(session)
+    assert all(item[2].size == 0 for item in report.values()), (
+        'После исправления повторная сверка не должна находить расхождений.'
+    )
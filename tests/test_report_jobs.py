@@ -0,0 +1,142 @@
+import asyncio
+import time
+from datetime import timedelta
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import report_jobs as report_jobs_module
+from app.services.google_api import get_report_sheets
+from app.services.report_jobs import (
+    DONE_STATUS, FAILED_STATUS, PENDING_STATUS, ReportJobs
+)
+
+
+class FakeServices:
+
+    def __init__(self, fail=False):
+        self.requests = []
+        self.fail = fail
+        self.service = SimpleNamespace(
+            spreadsheets=SimpleNamespace(
+                create=lambda **kwargs: ('create', kwargs),
+                values=SimpleNamespace(
+                    batchUpdate=lambda **kwargs: ('batchUpdate', kwargs)
+                ),
+            ),
+            permissions=SimpleNamespace(
+                create=lambda **kwargs: ('permissions', kwargs)
+            ),
+        )
+
+    async def discover(self, api_name, api_version):
+        return self.service
+
+    async def as_service_account(self, request):
+        if self.fail:
+            raise RuntimeError('Google API недоступен')
+        self.requests.append(request[0])
+        if request[0] == 'create':
+            return {'spreadsheetId': 'spreadsheet'}
+
+
+def make_context(services):
+    @asynccontextmanager
+    async def services_context():
+        yield services
+    return services_context
+
+
+def make_sheets(now='now', name='project'):
+    return get_report_sheets([(name, timedelta(days=1), 'description')], now)
+
+
+async def test_jobs_deduplicated():
+    services = FakeServices()
+    jobs = ReportJobs(services_context=make_context(services))
+    job = jobs.submit(make_sheets('first'), 'first')
+    assert job.as_dict()['status'] == PENDING_STATUS
+    assert jobs.submit(make_sheets('second'), 'second') is job, (
+        'Запрос отчёта с теми же данными должен получать запущенную задачу.'
+    )
+    other = jobs.submit(make_sheets(name='other'), 'now')
+    assert other is not job, (
+        'Отчёт с другими данными должен формироваться отдельной задачей.'
+    )
+    await asyncio.gather(*jobs.tasks)
+    assert job.as_dict() == dict(
+        id=job.id,
+        status=DONE_STATUS,
+        progress=100,
+        spreadsheet_url='https://docs.google.com/spreadsheets/d/spreadsheet',
+        error=None,
+    )
+    assert services.requests.count('create') == 2, (
+        'Каждая задача должна создавать одну таблицу.'
+    )
+    assert jobs.submit(make_sheets(), 'now') is job, (
+        'Готовый отчёт с теми же данными не должен формироваться заново.'
+    )
+
+
+async def test_failed_job_replaced():
+    jobs = ReportJobs(services_context=make_context(FakeServices(fail=True)))
+    job = jobs.submit(make_sheets(), 'now')
+    await asyncio.gather(*jobs.tasks)
+    assert job.status == FAILED_STATUS and job.error, (
+        'Ошибка Google API должна отмечать задачу неудачной.'
+    )
+    assert jobs.submit(make_sheets(), 'now') is not job, (
+        'Неудачная задача должна перезапускаться новой.'
+    )
+    await asyncio.gather(*jobs.tasks)
+
+
+async def test_finished_jobs_evicted():
+    jobs = ReportJobs(
+        services_context=make_context(FakeServices()), max_finished_jobs=1
+    )
+    first = jobs.submit(make_sheets(name='first'), 'now')
+    await asyncio.gather(*jobs.tasks)
+    second = jobs.submit(make_sheets(name='second'), 'now')
+    await asyncio.gather(*jobs.tasks)
+    assert jobs.get(first.id) is None and jobs.get(second.id) is second, (
+        'Должны храниться только последние завершённые задачи.'
+    )
+
+
+@pytest.fixture
+def fake_report_jobs(monkeypatch):
+    jobs = ReportJobs(services_context=make_context(FakeServices()))
+    monkeypatch.setattr(report_jobs_module, 'report_jobs', jobs)
+    monkeypatch.setattr('app.api.validators.report_jobs', jobs)
+    monkeypatch.setattr('app.api.endpoints.google_api.report_jobs', jobs)
+    return jobs
+
+
+def test_report_job_endpoints(superuser_client, fake_report_jobs, small_fully_charity_project):
+    response = superuser_client.post('/google/reports')
+    assert response.status_code == 202, (
+        'POST-запрос к `/google/reports` должен возвращать статус 202.'
+    )
+    job_id = response.json()['id']
+    for _ in range(100):
+        job = superuser_client.get(f'/google/reports/{job_id}').json()
+        if job['status'] == DONE_STATUS:
+            break
+        time.sleep(0.01)
+    assert job['status'] == DONE_STATUS and job['spreadsheet_url'], (
+        'Готовая задача должна возвращать ссылку на таблицу.'
+    )
+    response = superuser_client.get('/google/reports/unknown')
+    assert response.status_code == 404, (
+        'Запрос несуществующей задачи отчёта должен возвращать статус 404.'
+    )
+
+
+def test_report_jobs_superuser_only(user_client):
+    response = user_client.post('/google/reports')
+    assert response.status_code == 401, (
+        'Формировать отчёты может только суперпользователь.'
+    )
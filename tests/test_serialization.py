@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.cache import response_cache
+from app.core.config import settings
+
+
+@pytest.fixture
+def unicode_project(mixer):
+    return mixer.blend(
+        'app.models.charity_project.CharityProject',
+        name='Корм «Мурр» 🐈',
+        description='Строка с "кавычками" и \\ обратной чертой',
+        full_amount=300,
+        invested_amount=300,
+        fully_invested=True,
+        create_date=datetime(2020, 1, 2, 3, 4, 5, 678901),
+        close_date=datetime(2021, 1, 1),
+    )
+
+
+@pytest.fixture
+def fast_serialization(monkeypatch):
+    def switch(value):
+        monkeypatch.setattr(settings, 'fast_serialization', value)
+        response_cache.clear()
+    return switch
+
+
+@pytest.mark.parametrize('url, params', [
+    ('/charity_project/', {}),
+    ('/charity_project/', {'limit': 2}),
+    ('/charity_project/', {'fully_invested': False}),
+    ('/donation/', {}),
+    ('/donation/', {'limit': 1, 'user_id': 1}),
+])
+def test_fast_serialization_contract(
+    superuser_client, fast_serialization, charity_project, unicode_project,
+    small_fully_charity_project, donation, another_donation, url, params
+):
+    responses = []
+    for value in (False, True):
+        fast_serialization(value)
+        response = superuser_client.get(url, params=params)
+        responses.append((
+            response.status_code,
+            response.headers['content-type'],
+            response.headers.get('X-Next-Cursor'),
+            response.content,
+        ))
+    assert responses[0] == responses[1], (
+        'Быстрая сериализация должна давать ответ, байт в байт совпадающий '
+        'с ответом через схему.'
+    )
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+
+import pytest
+from conftest import engine
+from sqlalchemy import event
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+
+
+# Каждая пишущая транзакция получает версию изменений отдельным запросом,
+# список проектов и проект по id читают её для проверки кэша.
+@pytest.mark.parametrize('client, fixtures, method, url, json, budget', [
+    (
+        'superuser_client', ['charity_project', 'charity_project_nunchaku'],
+        'patch', '/charity_project/1', {'name': 'Новое имя'}, 4
+    ),
+    (
+        'superuser_client', ['charity_project', 'charity_project_nunchaku'],
+        'patch', '/charity_project/1', {'name': 'nunchaku'}, 3
+    ),
+    (
+        'superuser_client', ['charity_project', 'donation', 'another_donation'],
+        'patch', '/charity_project/1', {'full_amount': 1000200}, 6
+    ),
+    (
+        'user_client', ['charity_project', 'charity_project_nunchaku'],
+        'post', '/donation/', {'full_amount': 100}, 6
+    ),
+    (
+        'user_client', ['charity_project', 'charity_project_nunchaku'],
+        'post', '/donation/batch', [{'full_amount': 100}] * 50, 6
+    ),
+    ('user_client', ['charity_project'], 'get', '/charity_project/', None, 2),
+    ('user_client', ['charity_project'], 'get', '/charity_project/1', None, 2),
+    ('user_client', ['charity_project'], 'get', '/statistics/', None, 1),
+])
+def test_statement_budget(request, client, fixtures, method, url, json, budget):
+    client = request.getfixturevalue(client)
+    for fixture in fixtures:
+        request.getfixturevalue(fixture)
+    with count_statements() as statements:
+        response = getattr(client, method)(url, json=json)
+    assert response.status_code < 500, (
+        f'Запрос {method.upper()} {url} завершился ошибкой сервера.'
+    )
+    assert len(statements) <= budget, (
+        f'Запрос {method.upper()} {url} должен выполнять не больше {budget} '
+        f'SQL-запросов, выполнено {len(statements)}: {statements}'
+    )
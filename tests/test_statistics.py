@@ -0,0 +1,70 @@
+from conftest import TestingSessionLocal
+from sqlalchemy import update
+
+from app.models import FundStatistics
+from app.services.statistics import check_statistics
+
+
+async def test_statistics_follow_writes(superuser_client, investment_engine, charity_project, small_fully_charity_project, donation):
+    superuser_client.post('/charity_project/', json={
+        'name': 'Мячики',
+        'description': 'Мячики для котиков',
+        'full_amount': 500,
+    })
+    superuser_client.post('/charity_project/', json={
+        'name': 'Когтеточки',
+        'description': 'Когтеточки для котиков',
+        'full_amount': 200,
+    })
+    superuser_client.delete('/charity_project/4')
+    response = superuser_client.get('/statistics/')
+    assert response.status_code == 200, (
+        'При запросе статистики должен возвращаться статус-код 200.'
+    )
+    assert response.json() == {
+        'donations_count': 1,
+        'donation_amount': 100,
+        'invested_amount': 100,
+        'donation_balance': 0,
+        'projects_count': 3,
+        'open_projects': 2,
+    }, (
+        'Статистика должна учитывать созданные, удалённые и '
+        'профинансированные объекты.'
+    )
+    async with TestingSessionLocal() as session:
+        stored, expected = await check_statistics(session)
+    assert stored == expected, (
+        'Сохранённые счётчики должны совпадать с пересчитанными по таблицам.'
+    )
+
+
+async def test_statistics_donation_closes_projects(user_client, investment_engine, charity_project, small_fully_charity_project):
+    user_client.post('/donation/', json={'full_amount': 100})
+    user_client.post('/donation/batch', json=[{'full_amount': 2000000}])
+    async with TestingSessionLocal() as session:
+        stored, expected = await check_statistics(session)
+    assert stored == expected, (
+        'Сохранённые счётчики должны совпадать с пересчитанными по таблицам.'
+    )
+    assert stored['open_projects'] == 0, (
+        'Закрытые пожертвованиями проекты не должны считаться открытыми.'
+    )
+
+
+async def test_check_statistics_fixes_counters(charity_project, donation):
+    async with TestingSessionLocal() as session:
+        await session.execute(
+            update(FundStatistics).values(open_projects=10)
+        )
+        await session.commit()
+    async with TestingSessionLocal() as session:
+        stored, expected = await check_statistics(session, fix=True)
+    assert stored['open_projects'] == 10 and expected['open_projects'] == 1, (
+        'Сверка должна находить расхождение счётчиков с таблицами.'
+    )
+    async with TestingSessionLocal() as session:
+        stored, expected = await check_statistics(session)
+    assert stored == expected, (
+        'После исправления счётчики должны совпадать с таблицами.'
+    )